@@ -1,14 +1,40 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Optional
 import json
 from game_runner import run_game
-from constants import GAME_RULES
+from journal import GameJournal, load_game
+from prompts import PromptBuilder
+from llm_cache import ResponseCache
+from sessions import SessionLimitError, SessionRegistry
+from broadcast import DISCONNECT
+from deltas import DayUpdate, snapshot_event
+from metrics import GameTrace, record_stream_bytes, render_metrics, span
 import asyncio
+import os
+import re
+import zlib
 
-app = FastAPI()
+# Game sessions, one per game id. MAX_CONCURRENT_GAMES caps running games and
+# sessions idle for SESSION_IDLE_TIMEOUT seconds are stopped and dropped.
+sessions = SessionRegistry(
+    max_running=int(os.getenv("MAX_CONCURRENT_GAMES", "4")),
+    idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "1800")),
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reaper = asyncio.create_task(sessions.run_reaper())
+    yield
+    reaper.cancel()
+    await sessions.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -20,22 +46,106 @@ class ActionData(BaseModel):
 class GameStateUpdate(BaseModel):
     day: int
     message: str
-    player1_action: Optional[ActionData] = None
-    player2_action: Optional[ActionData] = None
+    actions: List[Optional[ActionData]] = []
+
+# Game and action logs keep GAME_LOG_WINDOW entries in memory; with
+# GAME_LOG_DIR set, older entries are spilled to per-game files there
+game_log_window = int(os.getenv("GAME_LOG_WINDOW", "200"))
+game_log_dir = os.getenv("GAME_LOG_DIR")
+
+# Shared LLM response cache, enabled by pointing LLM_CACHE_DIR at a directory
+response_cache = ResponseCache(os.environ["LLM_CACHE_DIR"]) if os.getenv("LLM_CACHE_DIR") else None
+
+# With GAME_JOURNAL_DIR set, every game is journaled to <dir>/<game_id>.jsonl
+# and can be resumed from its last complete day after a stop or restart
+game_journal_dir = os.getenv("GAME_JOURNAL_DIR")
+if game_journal_dir:
+    os.makedirs(game_journal_dir, exist_ok=True)
+
+# Pause between streamed days, in seconds
+game_day_delay = float(os.getenv("GAME_DAY_DELAY", "0.2"))
+
+# Compact prompts summarise each day's state within PROMPT_TOKEN_BUDGET tokens
+prompt_token_budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+
+# With GAME_TRACES=1 every game keeps its timing spans, served by /trace
+game_traces = os.getenv("GAME_TRACES", "0") == "1"
+
+# Game ids are uuid4 hex strings (SessionRegistry.create); anything else
+# must not reach the journal and log paths built from them
+GAME_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+def journal_path(game_id: str) -> str:
+    return os.path.join(game_journal_dir, f"{game_id}.jsonl")
+
+
+def get_session(game_id: str):
+    session = sessions.get(game_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown game id")
+    return session
+
+def serialize_game_state(state: dict, fields: Optional[tuple] = None) -> dict:
+    # The simulation runs on slotted entities; convert to pydantic models only here
+    serialized = dict(state) if fields is None else {key: state[key] for key in fields}
+    if "players" in serialized:
+        serialized["players"] = [player.to_model() for player in serialized["players"]]
+    if serialized.get("shared_market") is not None:
+        serialized["shared_market"] = serialized["shared_market"].to_model()
+    # Only the in-memory window of the game log is served
+    if "game_log" in serialized:
+        serialized["game_log"] = list(serialized["game_log"])
+    return serialized
 
-# Game state
-game_state = {
-    "player1": None,
-    "player2": None,
-    "shared_market": None,
-    "game_log": [],
-    "current_day": 1,
-    "game_over": False
-}
+def snapshot_game_state(game_state: dict) -> dict:
+    """A copy of the state that the running game's later days cannot change."""
+    snapshot = dict(game_state)
+    players = snapshot["players"]
+    if players:
+        # Copy-on-write clones: the live players copy their plots before changing them
+        clones = [player.clone() for player in players]
+        if snapshot.get("shared_market") is not None:
+            snapshot["shared_market"] = snapshot["shared_market"].clone(players, clones)
+        snapshot["players"] = clones
+    snapshot["game_log"] = list(snapshot.get("game_log", []))
+    return snapshot
 
-# Game control
-game_task = None
-stop_event = asyncio.Event()  # Initialize stop_event here
+def game_state_body(session, fields: Optional[tuple] = None) -> tuple:
+    """(ETag, JSON bytes) of the session's state, encoded once per state version and field selection."""
+    if session.state_cache_version != session.state_version:
+        session.state_cache.clear()
+        session.state_cache_version = session.state_version
+    cached = session.state_cache.get(fields)
+    if cached is None:
+        body = JSONResponse(jsonable_encoder(serialize_game_state(session.state_snapshot, fields))).body
+        selection = zlib.crc32(",".join(fields).encode()) if fields is not None else 0
+        etag = f'"{session.game_id}-{session.state_version}-{selection:08x}"'
+        cached = session.state_cache[fields] = (etag, body)
+    return cached
+
+
+async def stream_updates(session, subscription):
+    try:
+        async for update in subscription:
+            yield update.json
+    finally:
+        session.broadcaster.unsubscribe(subscription)
+
+async def stream_events(session, subscription, last_event_id: int):
+    try:
+        backlog = session.events.since(last_event_id)
+        if backlog is None:
+            # The client is further behind than the retained history: resync
+            last_event_id = session.events.last_id
+            backlog = [snapshot_event(session.state_snapshot, last_event_id)]
+        for event in backlog:
+            last_event_id = int(event["id"])
+            yield event
+        async for update in subscription:
+            if int(update.event["id"]) > last_event_id:
+                yield update.event
+    finally:
+        session.broadcaster.unsubscribe(subscription)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -43,62 +153,144 @@ async def read_root():
     with open("static/index.html", "r") as f:
         return f.read()
 
-@app.post("/start_game")
-async def start_game():
-    global game_state, game_task, stop_event
-    if game_task:
-        raise HTTPException(status_code=400, detail="Game already in progress")
+def launch_game(session, concurrent: bool = False, resume=None, plan_days: int = 1, compact_prompts: bool = False,
+                n_players: int = 2):
+    game_state = session.game_state
+    stop_event = session.stop_event
     
-    stop_event.clear()
-    player1_config = {"system_message": "You are an AI player in a farming game. Make decisions to maximize your score."}
-    player2_config = {"system_message": "You are an AI player in a farming game. Make decisions to maximize your score."}
+    if resume is not None:
+        n_players = len(resume.players)
+    player_configs = [
+        {"system_message": "You are an AI player in a farming game. Make decisions to maximize your score."}
+        for _ in range(n_players)
+    ]
+    session.trace = GameTrace() if game_traces else None
     
-    async def game_stream():
+    async def game_updates():
         try:
-            async for state in run_game(player1_config, player2_config, stop_event):
+            async for state in run_game(
+                player_configs, stop_event, concurrent_decisions=concurrent, cache=response_cache,
+                log_window=game_log_window, log_dir=os.path.join(game_log_dir, session.game_id) if game_log_dir else None,
+                journal=GameJournal(journal_path(session.game_id)) if game_journal_dir else None, resume=resume,
+                plan_days=plan_days, day_delay=game_day_delay, trace=session.trace,
+                prompts=PromptBuilder(compact=True, token_budget=prompt_token_budget) if compact_prompts else None,
+            ):
                 if stop_event.is_set():
                     print("Game stopped")
                     break
                 game_state.update(state)
-                yield json.dumps({
-                    "day": state.get("day", game_state["current_day"]),
-                    "message": f"Processed day {state.get('day', game_state['current_day'])}",
-                    "player1_action": state.get("player1_action"),
-                    "player2_action": state.get("player2_action"),
-                    "player1_action_log": state.get("player1_action_log", []),
-                    "player2_action_log": state.get("player2_action_log", []),
-                    "game_over": state.get("game_over", False)
-                })
+                session.state_snapshot = snapshot_game_state(game_state)
+                session.state_version += 1
+                session.touch()
+                with span("encode", session.trace, day=state.get("day")):
+                    event = session.events.append(*session.delta_encoder.encode(state))
+                    update_json = json.dumps({
+                        "day": state.get("day", game_state["current_day"]),
+                        "message": f"Processed day {state.get('day', game_state['current_day'])}",
+                        "actions": state.get("actions", []),
+                        "action_logs": state.get("action_logs", []),
+                        "game_over": state.get("game_over", False)
+                    })
+                record_stream_bytes("events", len(event["data"]))
+                record_stream_bytes("game_stream", len(update_json))
+                yield DayUpdate(event=event, json=update_json)
                 if state.get("game_over", False):
                     break
         finally:
             print("Game stream finished")
 
-    async def run_game_task():
-        async for _ in game_stream():
-            pass
+    # Subscribe before the producer starts so this response sees day 1
+    subscription = session.broadcaster.subscribe()
+    session.game_task = asyncio.create_task(session.broadcaster.run(game_updates()))
+    return StreamingResponse(stream_updates(session, subscription), media_type="application/json", headers={"X-Game-Id": session.game_id})
+
+@app.post("/start_game")
+async def start_game(concurrent: bool = False, plan_days: int = 1, compact_prompts: bool = False, players: int = 2):
+    if players < 1:
+        raise HTTPException(status_code=400, detail="A game needs at least one player")
+    try:
+        session = sessions.create()
+    except SessionLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return launch_game(session, concurrent, plan_days=plan_days, compact_prompts=compact_prompts, n_players=players)
+
+@app.post("/resume_game")
+async def resume_game(game_id: str, concurrent: bool = False, plan_days: int = 1, compact_prompts: bool = False):
+    """Continue a journaled game after its last complete day, without re-asking the agents."""
+    if not GAME_ID_PATTERN.fullmatch(game_id):
+        raise HTTPException(status_code=400, detail="Invalid game id")
+    if not game_journal_dir or not os.path.exists(journal_path(game_id)):
+        raise HTTPException(status_code=404, detail="No journal for this game id")
+    existing = sessions.get(game_id)
+    if existing is not None and existing.running:
+        raise HTTPException(status_code=409, detail="Game is still running")
+    resume = load_game(journal_path(game_id))
+    await sessions.remove(game_id)
+    try:
+        session = sessions.create(game_id, first_day=resume.day + 1)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return launch_game(session, concurrent, resume, plan_days, compact_prompts)
 
-    game_task = asyncio.create_task(run_game_task())
-    return StreamingResponse(game_stream(), media_type="application/json")
+@app.get("/game_stream")
+async def game_stream(game_id: str):
+    # Spectators join the running game's broadcast; nothing is re-simulated
+    session = get_session(game_id)
+    subscription = session.broadcaster.subscribe()
+    return StreamingResponse(stream_updates(session, subscription), media_type="application/json", headers={"X-Game-Id": session.game_id})
 
 @app.post("/stop_game")
-async def stop_game():
-    global game_task, stop_event
-    stop_event.set()
-    if game_task:
-        try:
-            await asyncio.wait_for(game_task, timeout=5.0)
-        except asyncio.TimeoutError:
-            print("Game task didn't finish in time, forcefully cancelling")
-            game_task.cancel()
-        game_task = None
-    return {"message": "Game stopped"}
+async def stop_game(game_id: str):
+    session = get_session(game_id)
+    await session.stop()
+    return {"message": "Game stopped", "game_id": game_id}
 
 @app.get("/game_state")
-async def get_game_state():
-    if game_state["player1"] is None or game_state["player2"] is None:
+async def get_game_state(request: Request, game_id: str, fields: Optional[str] = None):
+    """The full game state, or only the comma-separated top-level `fields`.
+
+    The encoded state is cached until the next day is processed, and a
+    matching If-None-Match gets a 304 with no body.
+    """
+    session = get_session(game_id)
+    game_state = session.game_state
+    if not game_state["players"]:
         raise HTTPException(status_code=400, detail="Game not started")
-    return game_state
+    selected = None
+    if fields:
+        selected = tuple(sorted({field.strip() for field in fields.split(",") if field.strip()}))
+        unknown = [field for field in selected if field not in game_state]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    etag, body = game_state_body(session, selected)
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+@app.get("/metrics")
+async def metrics():
+    """Process-wide histograms and counters in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/trace")
+async def trace(game_id: str):
+    """The game's timing spans, in the order they finished (needs GAME_TRACES=1)."""
+    session = get_session(game_id)
+    if session.trace is None:
+        raise HTTPException(status_code=404, detail="Tracing is not enabled for this game")
+    return {"game_id": game_id, "spans": session.trace.spans}
+
+@app.get("/events")
+async def events(request: Request, game_id: str):
+    """Server-sent per-day deltas. Reconnecting clients resume after Last-Event-ID."""
+    session = get_session(game_id)
+    last_event_id = request.headers.get("last-event-id", "0")
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else 0
+    # Subscribe before reading the backlog so no event falls in between. A
+    # client that can't keep up is disconnected and resumes from its last id.
+    subscription = session.broadcaster.subscribe(replay_latest=False, policy=DISCONNECT)
+    return EventSourceResponse(stream_events(session, subscription, last_event_id))
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,452 @@
+import numpy as np
+from typing import Optional, Sequence
+from entities import CropState, PlayerState, PlotState
+from rules import RULES, SEASON_LENGTH, CompiledRules
+
+# The batch stores crops, weather and upgrades as the integer ids of its
+# CompiledRules (`BatchGameState.rules`) and reads every per-id table from
+# `rules.arrays`, so a batch built for varied rules plays by them.
+
+EMPTY = -1  # crop index of a vacant plot
+
+# Action codes understood by process_actions
+NOOP = 0          # unknown action, or Buy(<cooperative upgrade>): no effect
+REST = 1
+PLANT = 2
+HARVEST = 3
+MAINTENANCE = 4
+SELL = 5
+BUY_PLOT = 6
+BUY_UPGRADE = 7
+BUY_UNKNOWN = 8   # Buy(<anything else>): penalised
+
+def _plot_cost_table(rules: CompiledRules, max_plots: int) -> np.ndarray:
+    # Shares the Python-float table with game_logic.buy_item so costs are bit-identical
+    return np.array(rules.plot_costs(max_plots))
+
+
+class BatchGameState:
+    """N independent player states stored as NumPy arrays.
+
+    Row i corresponds to one `PlayerState`. Plot arrays have shape (N, P) where P
+    is the largest plot count in the batch; plots past `n_plots[i]` are unused.
+    Rows that share a `MarketState` point at the same row of `supply`/`demand`
+    through `market_index`. A row's open sell orders are kept as one quantity
+    per crop in `pending`, ordered against other rows by `pending_order`.
+    """
+
+    def __init__(self, n_games: int, n_plots: int = 1, n_markets: Optional[int] = None, rules: CompiledRules = RULES):
+        self.rules = rules
+        n_crops = len(rules.crop_types)
+        self.day = np.ones(n_games, dtype=np.int64)
+        self.weather = np.full(n_games, rules.weather_index["Sunny"], dtype=np.int64)
+        self.money = np.full(n_games, rules.starting_money, dtype=float)
+        self.energy = np.full(n_games, rules.max_energy, dtype=float)
+        self.invalid_action_count = np.zeros(n_games, dtype=np.int64)
+
+        self.n_plots = np.full(n_games, n_plots, dtype=np.int64)
+        self.crop = np.full((n_games, n_plots), EMPTY, dtype=np.int64)
+        self.planted_at = np.zeros((n_games, n_plots), dtype=np.int64)
+        self.growth = np.zeros((n_games, n_plots))
+        self.quality = np.ones((n_games, n_plots))
+        self.soil = np.ones((n_games, n_plots))
+
+        self.harvested = np.zeros((n_games, n_crops), dtype=np.int64)
+        # game_logic treats "never harvested" differently from "harvested 0"
+        self.harvested_seen = np.zeros((n_games, n_crops), dtype=bool)
+
+        self.upgrade_counts = np.zeros((n_games, len(rules.upgrade_types)), dtype=np.int64)
+        # Upgrade modifiers are accumulated in purchase order, which is the
+        # order process_player_state sums them in.
+        self.water_saving = np.zeros(n_games)
+        self.weather_protection = np.zeros(n_games)
+        self.yield_boost = np.zeros(n_games)
+        self.energy_saving = np.zeros(n_games)
+
+        if n_markets is None:
+            n_markets = n_games
+        self.market_index = np.arange(n_games, dtype=np.int64) % n_markets
+        self.supply = np.zeros((n_markets, n_crops))
+        self.demand = np.zeros((n_markets, n_crops))
+        self.pending = np.zeros((n_games, n_crops), dtype=np.int64)
+        self.pending_order = np.zeros((n_games, n_crops), dtype=np.int64)
+        self.next_order_id = 0
+
+    @property
+    def n_games(self) -> int:
+        return self.day.shape[0]
+
+    @property
+    def season(self) -> np.ndarray:
+        return ((self.day - 1) // SEASON_LENGTH) % len(self.rules.seasons)
+
+    def ensure_plot_capacity(self, n_plots: int):
+        extra = n_plots - self.crop.shape[1]
+        if extra <= 0:
+            return
+        n = self.n_games
+        self.crop = np.hstack([self.crop, np.full((n, extra), EMPTY, dtype=np.int64)])
+        self.planted_at = np.hstack([self.planted_at, np.zeros((n, extra), dtype=np.int64)])
+        self.growth = np.hstack([self.growth, np.zeros((n, extra))])
+        self.quality = np.hstack([self.quality, np.ones((n, extra))])
+        self.soil = np.hstack([self.soil, np.ones((n, extra))])
+
+    def add_upgrade(self, rows: np.ndarray, upgrade: np.ndarray):
+        effects = self.rules.arrays.upgrade_effects
+        np.add.at(self.upgrade_counts, (rows, upgrade), 1)
+        self.water_saving[rows] += effects["water_saving"][upgrade]
+        self.weather_protection[rows] += effects["weather_protection"][upgrade]
+        self.yield_boost[rows] += effects["yield_boost"][upgrade]
+        self.energy_saving[rows] += effects["energy_saving"][upgrade]
+
+    @classmethod
+    def from_states(cls, states: Sequence, markets: Sequence = (), market_index: Optional[Sequence[int]] = None) -> "BatchGameState":
+        """Build a batch from `PlayerState` objects (and optionally their `MarketState`s), under their rules."""
+        rules = states[0].rules
+        n_plots = max(len(s.plots) for s in states)
+        batch = cls(len(states), n_plots, n_markets=max(1, len(markets)) if markets else None, rules=rules)
+        if market_index is not None:
+            batch.market_index = np.asarray(market_index, dtype=np.int64)
+        for i, state in enumerate(states):
+            batch.day[i] = state.day
+            batch.weather[i] = rules.weather_index[state.weather]
+            batch.money[i] = state.money
+            batch.energy[i] = state.energy
+            batch.invalid_action_count[i] = state.invalid_action_count
+            batch.n_plots[i] = len(state.plots)
+            for j, plot in enumerate(state.plots):
+                batch.soil[i, j] = plot.soil_quality
+                if plot.crop is not None:
+                    batch.crop[i, j] = rules.crop_index[plot.crop.type]
+                    batch.planted_at[i, j] = plot.crop.planted_at
+                    batch.growth[i, j] = plot.crop.growth_progress
+                    batch.quality[i, j] = plot.crop.quality
+            for crop_type, amount in state.harvested_crops.items():
+                batch.harvested[i, rules.crop_index[crop_type]] = amount
+                batch.harvested_seen[i, rules.crop_index[crop_type]] = True
+            for upgrade in state.upgrades:
+                if upgrade in rules.upgrade_index:
+                    batch.add_upgrade(np.array([i]), np.array([rules.upgrade_index[upgrade]]))
+        for m, market in enumerate(markets):
+            for crop_type, amount in market.supply.items():
+                batch.supply[m, rules.crop_index[crop_type]] = amount
+            for crop_type, amount in market.demand.items():
+                batch.demand[m, rules.crop_index[crop_type]] = amount
+            for crop_type, book in market.books.items():
+                for _, order_id, owner, quantity, _ in sorted(book.asks):
+                    i, c = states.index(owner), rules.crop_index[crop_type]
+                    if not batch.pending[i, c]:
+                        batch.pending_order[i, c] = order_id
+                    batch.pending[i, c] += quantity
+            batch.next_order_id = max(batch.next_order_id, market.next_order_id)
+        return batch
+
+    def to_states(self) -> list:
+        """Convert back to `PlayerState` objects.
+
+        Upgrades come back in canonical order and `action_log`/`market_trends`
+        are not tracked by the batch engine. Open sell orders stay in the batch.
+        """
+        rules = self.rules
+        states = []
+        for i in range(self.n_games):
+            plots = []
+            for j in range(self.n_plots[i]):
+                crop = None
+                if self.crop[i, j] != EMPTY:
+                    crop = CropState(rules.crop_types[self.crop[i, j]], int(self.planted_at[i, j]),
+                                     float(self.growth[i, j]), float(self.quality[i, j]))
+                plots.append(PlotState(float(self.soil[i, j]), crop))
+            states.append(PlayerState(
+                day=int(self.day[i]),
+                season=rules.seasons[self.season[i]],
+                weather=rules.weather_types[self.weather[i]],
+                money=float(self.money[i]),
+                energy=float(self.energy[i]),
+                plots=plots,
+                harvested_crops={rules.crop_types[c]: int(self.harvested[i, c]) for c in np.flatnonzero(self.harvested_seen[i])},
+                upgrades=[rules.upgrade_types[u] for u in range(len(rules.upgrade_types)) for _ in range(self.upgrade_counts[i, u])],
+                invalid_action_count=int(self.invalid_action_count[i]),
+                rules=rules,
+            ))
+        return states
+
+
+class ActionBatch:
+    """One encoded action per row of a `BatchGameState`.
+
+    `plot` is the 1-based plot number as given to the action, `item` is an
+    upgrade or maintenance index depending on `code`.
+    """
+
+    def __init__(self, code, crop=None, plot=None, amount=None, item=None):
+        self.code = np.asarray(code, dtype=np.int64)
+        n = self.code.shape[0]
+        self.crop = np.full(n, EMPTY, dtype=np.int64) if crop is None else np.asarray(crop, dtype=np.int64)
+        self.plot = np.zeros(n, dtype=np.int64) if plot is None else np.asarray(plot, dtype=np.int64)
+        self.amount = np.zeros(n, dtype=np.int64) if amount is None else np.asarray(amount, dtype=np.int64)
+        self.item = np.zeros(n, dtype=np.int64) if item is None else np.asarray(item, dtype=np.int64)
+
+    @classmethod
+    def from_actions(cls, actions: Sequence[dict], rules: CompiledRules = RULES) -> "ActionBatch":
+        encoded = [encode_action(a, rules) for a in actions]
+        return cls(*zip(*encoded)) if encoded else cls([])
+
+
+def encode_action(action: dict, rules: CompiledRules = RULES) -> tuple:
+    """Encode a `parse_action` dict as (code, crop, plot, amount, item).
+
+    Raises ValueError for actions that game_logic.process_action would fail on
+    with an exception rather than a penalty (unknown crop or maintenance type).
+    """
+    name = action["name"]
+    params = action.get("parameters", [])
+    if name == "Rest":
+        return (REST, EMPTY, 0, 0, 0)
+    if name == "Plant":
+        if params[0] not in rules.crop_index:
+            raise ValueError(f"Unknown crop type: {params[0]}")
+        return (PLANT, rules.crop_index[params[0]], int(params[1]), 0, 0)
+    if name == "Harvest":
+        return (HARVEST, EMPTY, int(params[0]), 0, 0)
+    if name == "Maintenance":
+        if params[0] not in rules.maintenance_index:
+            raise ValueError(f"Unknown maintenance type: {params[0]}")
+        return (MAINTENANCE, EMPTY, int(params[1]), 0, rules.maintenance_index[params[0]])
+    if name == "Sell":
+        # An unknown crop can never have been harvested, so it is penalised like one
+        return (SELL, rules.crop_index.get(params[0], EMPTY), 0, int(params[1]), 0)
+    if name == "Buy":
+        item = params[0]
+        if item in rules.cooperative_upgrades:
+            return (NOOP, EMPTY, 0, 0, 0)
+        if item == "plot":
+            return (BUY_PLOT, EMPTY, 0, 0, 0)
+        if item in rules.individual_upgrades:
+            return (BUY_UPGRADE, EMPTY, 0, 0, rules.upgrade_index[item])
+        return (BUY_UNKNOWN, EMPTY, 0, 0, 0)
+    return (NOOP, EMPTY, 0, 0, 0)
+
+
+def apply_invalid_action_penalty(batch: BatchGameState, rows: np.ndarray):
+    rules = batch.rules
+    batch.invalid_action_count[rows] += 1
+    batch.money[rows] = np.maximum(0, batch.money[rows] - rules.invalid_action_penalty)
+
+def _plant(batch: BatchGameState, rows: np.ndarray, actions: ActionBatch):
+    rules = batch.rules
+    arrays = rules.arrays
+    crop = actions.crop[rows]
+    plot = actions.plot[rows] - 1
+    in_range = (plot >= 0) & (plot < batch.n_plots[rows])
+    safe_plot = np.where(in_range, plot, 0)
+    vacant = batch.crop[rows, safe_plot] == EMPTY
+    affordable = (batch.money[rows] >= arrays.crop_cost[crop]) & (batch.energy[rows] >= arrays.plant_energy[crop])
+    ok = in_range & vacant & affordable
+
+    apply_invalid_action_penalty(batch, rows[~ok])
+    rows, crop, plot = rows[ok], crop[ok], plot[ok]
+    batch.money[rows] -= arrays.crop_cost[crop]
+    batch.energy[rows] -= arrays.plant_energy[crop]
+    batch.crop[rows, plot] = crop
+    batch.planted_at[rows, plot] = batch.day[rows]
+    batch.growth[rows, plot] = 0
+    batch.quality[rows, plot] = 1.0
+    batch.soil[rows, plot] -= rules.soil_depletion_rate
+
+def _harvest(batch: BatchGameState, rows: np.ndarray, actions: ActionBatch):
+    rules = batch.rules
+    arrays = rules.arrays
+    plot = actions.plot[rows] - 1
+    in_range = (plot >= 0) & (plot < batch.n_plots[rows])
+    safe_plot = np.where(in_range, plot, 0)
+    crop = batch.crop[rows, safe_plot]
+    has_crop = in_range & (crop != EMPTY)
+    safe_crop = np.where(has_crop, crop, 0)
+    enough_energy = batch.energy[rows] >= arrays.harvest_energy[safe_crop]
+    mature = batch.growth[rows, safe_plot] >= 1.0
+    ok = has_crop & enough_energy & mature
+
+    apply_invalid_action_penalty(batch, rows[~ok])
+    rows, plot, crop = rows[ok], plot[ok], crop[ok]
+    batch.energy[rows] -= arrays.harvest_energy[crop]
+    soil_factor = 1 + (batch.soil[rows, plot] - 1) * rules.soil_yield_factor
+    total_yield = np.trunc(arrays.crop_base_yield[crop] * arrays.weather_yield[batch.weather[rows]] * soil_factor * batch.quality[rows, plot]).astype(np.int64)
+    np.add.at(batch.harvested, (rows, crop), total_yield)
+    batch.harvested_seen[rows, crop] = True
+    batch.crop[rows, plot] = EMPTY
+    batch.growth[rows, plot] = 0
+    batch.quality[rows, plot] = 1.0
+
+def _maintenance(batch: BatchGameState, rows: np.ndarray, actions: ActionBatch):
+    rules = batch.rules
+    arrays = rules.arrays
+    plot = actions.plot[rows] - 1
+    energy_cost = arrays.maintenance_energy[actions.item[rows]]
+    in_range = (plot >= 0) & (plot < batch.n_plots[rows])
+    ok = in_range & (batch.energy[rows] >= energy_cost)
+
+    apply_invalid_action_penalty(batch, rows[~ok])
+    rows, plot, energy_cost = rows[ok], plot[ok], energy_cost[ok]
+    batch.energy[rows] -= energy_cost
+    batch.soil[rows, plot] = np.minimum(1.0, batch.soil[rows, plot] + rules.soil_maintenance_improvement)
+    planted = batch.crop[rows, plot] != EMPTY
+    batch.quality[rows[planted], plot[planted]] *= 1.1
+
+def _sell(batch: BatchGameState, rows: np.ndarray, actions: ActionBatch):
+    rules = batch.rules
+    # Orders are queued in row order, so rows sharing a market must be
+    # submitted in separate calls to reproduce the sequential order of game_runner.
+    crop = actions.crop[rows]
+    amount = actions.amount[rows]
+    known = crop != EMPTY
+    safe_crop = np.where(known, crop, 0)
+    valid = known & (amount > 0)
+    has_crops = valid & batch.harvested_seen[rows, safe_crop] & (batch.harvested[rows, safe_crop] >= amount)
+    energy_cost = rules.trade_energy[rules.market_index["local"]]
+    ok = has_crops & (batch.energy[rows] >= energy_cost)
+
+    apply_invalid_action_penalty(batch, rows[~ok])
+    rows, crop, amount = rows[ok], crop[ok], amount[ok]
+    batch.energy[rows] -= energy_cost
+    batch.harvested[rows, crop] -= amount
+    new = batch.pending[rows, crop] == 0
+    batch.pending_order[rows[new], crop[new]] = batch.next_order_id + np.arange(int(new.sum()))
+    batch.next_order_id += int(new.sum())
+    batch.pending[rows, crop] += amount
+
+def clear_market(batch: BatchGameState):
+    """Vectorized game_logic.clear_market for every market in the batch.
+
+    With one quantity per row and crop, a row's orders are filled together at
+    the position of its first one. That matches the order book exactly as long
+    as each player's orders for a crop are contiguous within the day, which
+    holds whenever players take their turns one after the other.
+    """
+    rules = batch.rules
+    arrays = rules.arrays
+    offered = np.zeros(batch.supply.shape, dtype=np.int64)
+    np.add.at(offered, batch.market_index, batch.pending)
+    price_factor = np.clip(1 + (batch.demand - batch.supply) / 100,
+                           1 - rules.max_price_fluctuation, 1 + rules.max_price_fluctuation)
+    reference_price = arrays.crop_base_price * price_factor
+    capacity = rules.buyer_quantity * len(arrays.buyer_price_offsets)
+    matched = np.minimum(offered, capacity)
+    # The uniform clearing price is the lowest buyer level that was reached
+    level = np.maximum(matched - 1, 0) // rules.buyer_quantity
+    clearing_price = reference_price * (1 + arrays.buyer_price_offsets[level])
+
+    rows, crop = np.nonzero(batch.pending)
+    if rows.size:
+        market = batch.market_index[rows]
+        order = np.lexsort((batch.pending_order[rows, crop], crop, market))
+        rows, crop, market = rows[order], crop[order], market[order]
+        quantity = batch.pending[rows, crop]
+        offered_before = np.cumsum(quantity) - quantity
+        first = np.ones(rows.size, dtype=bool)
+        first[1:] = (market[1:] != market[:-1]) | (crop[1:] != crop[:-1])
+        offered_before -= np.maximum.accumulate(np.where(first, offered_before, 0))
+        filled = np.clip(matched[market, crop] - offered_before, 0, quantity)
+        proceeds = np.trunc(clearing_price[market, crop] * rules.market_price_factor[rules.market_index["local"]] * filled)
+        np.add.at(batch.money, rows, proceeds)
+        batch.harvested[rows, crop] += quantity - filled
+        batch.pending[rows, crop] = 0
+
+    batch.supply = batch.supply * rules.market_decay + offered
+    batch.demand = batch.demand * rules.market_decay + capacity
+
+def _buy_plot(batch: BatchGameState, rows: np.ndarray):
+    cost = _plot_cost_table(batch.rules, int(batch.n_plots[rows].max(initial=0)))[batch.n_plots[rows]]
+    ok = batch.money[rows] >= cost
+
+    apply_invalid_action_penalty(batch, rows[~ok])
+    rows, cost = rows[ok], cost[ok]
+    batch.money[rows] -= cost
+    if rows.size:
+        batch.ensure_plot_capacity(int(batch.n_plots[rows].max()) + 1)
+    new_plot = batch.n_plots[rows]
+    batch.crop[rows, new_plot] = EMPTY
+    batch.soil[rows, new_plot] = 1.0
+    batch.growth[rows, new_plot] = 0
+    batch.quality[rows, new_plot] = 1.0
+    batch.n_plots[rows] += 1
+
+def _buy_upgrade(batch: BatchGameState, rows: np.ndarray, actions: ActionBatch):
+    arrays = batch.rules.arrays
+    upgrade = actions.item[rows]
+    owned = batch.upgrade_counts[rows, upgrade] > 0
+    ok = ~owned & (batch.money[rows] >= arrays.upgrade_cost[upgrade])
+
+    apply_invalid_action_penalty(batch, rows[~ok])
+    rows, upgrade = rows[ok], upgrade[ok]
+    batch.money[rows] -= arrays.upgrade_cost[upgrade]
+    batch.add_upgrade(rows, upgrade)
+
+def process_actions(batch: BatchGameState, actions: ActionBatch, rows: Optional[np.ndarray] = None):
+    """Apply one action per row, like game_logic.process_action does per state.
+
+    `actions` has one entry per row of the batch; `rows` optionally restricts
+    the call to a subset (e.g. every Player 1 row, then every Player 2 row).
+    """
+    selected = np.arange(batch.n_games) if rows is None else np.asarray(rows, dtype=np.int64)
+    code = actions.code[selected]
+
+    _plant(batch, selected[code == PLANT], actions)
+    _harvest(batch, selected[code == HARVEST], actions)
+    _maintenance(batch, selected[code == MAINTENANCE], actions)
+    _sell(batch, selected[code == SELL], actions)
+    _buy_plot(batch, selected[code == BUY_PLOT])
+    _buy_upgrade(batch, selected[code == BUY_UPGRADE], actions)
+    apply_invalid_action_penalty(batch, selected[code == BUY_UNKNOWN])
+
+    rules = batch.rules
+    resting = selected[code == REST]
+    batch.energy[resting] = np.minimum(batch.energy[resting] + rules.energy_regen_per_day, rules.max_energy)
+
+def process_cooperative_upgrade(batch: BatchGameState, groups: np.ndarray, upgrade: np.ndarray):
+    """Vectorized game_logic.process_cooperative_upgrade.
+
+    Row k of `groups` holds the batch rows of every player of one game (shape
+    purchases x players); they each pay an equal share of `upgrade[k]` and all
+    get it, or nobody does if any of them cannot afford the share.
+    """
+    arrays = batch.rules.arrays
+    groups = np.asarray(groups, dtype=np.int64).reshape(len(upgrade), -1)
+    upgrade = np.asarray(upgrade, dtype=np.int64)
+    share = arrays.upgrade_cost[upgrade] / groups.shape[1]
+    ok = arrays.upgrade_is_cooperative[upgrade] & (batch.money[groups] >= share[:, None]).all(axis=1)
+    groups, upgrade, share = groups[ok], upgrade[ok], share[ok]
+    for rows in groups.T:
+        batch.money[rows] -= share
+        batch.add_upgrade(rows, upgrade)
+
+def process_day(batch: BatchGameState, weather):
+    """Advance every row by one day with the given weather index (scalar or per row)."""
+    rules = batch.rules
+    clear_market(batch)
+    batch.day += 1
+    batch.weather[:] = weather
+    batch.energy = np.minimum(batch.energy + rules.energy_regen_per_day, rules.max_energy)
+    process_player_state(batch)
+
+def process_player_state(batch: BatchGameState):
+    rules = batch.rules
+    arrays = rules.arrays
+    growth_rate = arrays.weather_growth[batch.weather]
+    growth_rate = np.where(batch.weather_protection > 0, np.maximum(growth_rate, 1.0), growth_rate)
+    growth_rate = growth_rate * (1 + batch.water_saving)
+
+    planted = batch.crop != EMPTY
+    growth_time = arrays.crop_growth_time[np.where(planted, batch.crop, 0)]
+    new_growth = batch.growth + growth_rate[:, None] / growth_time
+    batch.growth = np.where(planted, np.minimum(1.0, new_growth), batch.growth)
+    batch.quality = np.where(planted, batch.quality * (1 + batch.yield_boost)[:, None], batch.quality)
+    depleted = np.maximum(0, batch.soil - rules.soil_depletion_rate)
+    batch.soil = np.where(planted, depleted, batch.soil)
+
+    batch.energy = np.where(batch.energy_saving > 0,
+                            np.minimum(batch.energy * (1 + batch.energy_saving), rules.max_energy),
+                            batch.energy)
+
+def calculate_final_scores(batch: BatchGameState) -> np.ndarray:
+    return batch.money + batch.harvested.sum(axis=1)
@@ -0,0 +1,385 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Optional
+import numpy as np
+from entities import CropState, MarketState, PlayerState, PlotState
+from game_logic import apply_player_action, process_action, process_day, process_player_state
+from game_rng import GameRNG
+from constants import GAME_RULES
+
+# Micro and end-to-end benchmarks for the hot paths. Each benchmark returns a
+# zero-argument callable, optionally with a `teardown` attribute that is called
+# once it has been timed; `measure` times it and the results are written as
+# JSON so a later run can be compared against a saved baseline:
+#
+#   python benchmarks.py run --out baseline.json
+#   python benchmarks.py run --out current.json
+#   python benchmarks.py compare baseline.json current.json
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], None]]] = {}
+
+def benchmark(name: str):
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+def new_player(n_plots: int = 1, crop: Optional[str] = "Wheat") -> PlayerState:
+    plots = [PlotState(crop=CropState(crop, 1) if crop else None) for _ in range(n_plots)]
+    return PlayerState(money=1e9, energy=GAME_RULES["max_energy"], plots=plots,
+                       upgrades=["Irrigation", "Fertilizer", "Automation"])
+
+def measure(func: Callable[[], None], min_time: float = 0.2, repeat: int = 5) -> dict:
+    """Per-call seconds over `repeat` rounds of enough calls to last `min_time`."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or number >= 1 << 20:
+            break
+        number *= 2
+    number = max(1, int(number * min_time / 10 / max(elapsed, 1e-9)))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(timings), "best": min(timings), "calls": number * repeat}
+
+# --- Simulation ---------------------------------------------------------------
+
+@benchmark("process_day")
+def bench_process_day(n_players=2):
+    players, market = [new_player(100) for _ in range(n_players)], MarketState()
+    rng = GameRNG(0, n_players=n_players)
+
+    def run():
+        if players[0].day >= GAME_RULES["total_days"]:
+            for state in players:
+                state.day = 1
+        process_day(players, market, rng=rng)
+    return run
+
+for _players in (8, 32):
+    benchmark(f"process_day[{_players} players]")(lambda n_players=_players: bench_process_day(n_players))
+
+for _plots in (1, 100, 10_000):
+    @benchmark(f"process_player_state[{_plots} plots]")
+    def bench_process_player_state(n_plots=_plots):
+        state = new_player(n_plots)
+        return lambda: process_player_state(state)
+
+@benchmark("fast_forward[10000 plots, 30 days]")
+def bench_fast_forward():
+    from crop_scheduler import fast_forward
+    players, market = [new_player(10_000)], MarketState()
+    rng = GameRNG(0, n_players=1)
+
+    def run():
+        players[0].day = 1
+        fast_forward(players, market, rng, 30, rest=False)
+    return run
+
+@benchmark("clone_world[2 players, 100 plots]")
+def bench_clone_world():
+    from search_bot import clone_world
+    players, market = [new_player(100), new_player(100)], MarketState()
+    return lambda: clone_world(players, market)
+
+@benchmark("search_bot[depth 2]")
+def bench_search_bot():
+    from search_bot import SearchBot
+    players, market = [new_player(4), new_player(4)], MarketState()
+    players[0].harvested_crops["Wheat"] = 10
+    bot = SearchBot(depth=2)
+    return lambda: bot.choose(0, players, market)
+
+@benchmark("record_game[2 players]")
+def bench_record_game():
+    from trajectories import record_game
+    return lambda: record_game(0)
+
+@benchmark("surrogate rank[candidates of one decision]")
+def bench_surrogate_rank():
+    from search_bot import candidate_actions
+    from surrogate import ActionValueModel
+    from trajectories import generate
+    model, _ = ActionValueModel.train(generate(50, workers=1), n_estimators=100)
+    state, market = new_player(4), MarketState()
+    state.plots[0].crop.growth_progress = 1.0
+    state.harvested_crops["Wheat"] = 10
+    actions = candidate_actions(state)
+    return lambda: model.rank(state, market, actions)
+
+@benchmark("trajectory_store day slice[1000 games]")
+def bench_trajectory_store():
+    import tempfile
+    from headless_runner import play_game
+    from policies import greedy_policy
+    from trajectory_store import GameRecorder, TrajectoryStore
+    directory = tempfile.TemporaryDirectory(prefix="trajectory_store_")
+    store = TrajectoryStore(directory.name, "a")
+    recorder = GameRecorder()
+    columns = recorder.columns(play_game(greedy_policy, greedy_policy, 0, recorder=recorder))
+    for game_id in range(1000):
+        store.append_game(game_id, columns)
+    store.flush()
+    store = TrajectoryStore(store.path)
+    # Every player's money on one day across all games, straight from the map
+    def run():
+        store.column("money")[store.day_rows(25)]
+    run.teardown = directory.cleanup
+    return run
+
+# --- Actions ------------------------------------------------------------------
+# Each call first resets what the previous call changed, so every call takes
+# the successful path instead of drifting into penalties.
+
+@benchmark("process_action[Plant]")
+def bench_plant():
+    state, market = new_player(1, crop=None), MarketState()
+    action = {"name": "Plant", "parameters": ["Wheat", "1"]}
+
+    def run():
+        state.plots[0].crop = None
+        state.energy = GAME_RULES["max_energy"]
+        process_action(state, market, action)
+    return run
+
+@benchmark("process_action[Harvest]")
+def bench_harvest():
+    state, market = new_player(1), MarketState()
+    action = {"name": "Harvest", "parameters": ["1"]}
+
+    def run():
+        state.plots[0].crop = CropState("Wheat", 1, 1.0)
+        state.energy = GAME_RULES["max_energy"]
+        process_action(state, market, action)
+    return run
+
+@benchmark("process_action[Maintenance]")
+def bench_maintenance():
+    state, market = new_player(1), MarketState()
+    action = {"name": "Maintenance", "parameters": ["water", "1"]}
+
+    def run():
+        state.energy = GAME_RULES["max_energy"]
+        process_action(state, market, action)
+    return run
+
+@benchmark("process_action[Sell]")
+def bench_sell():
+    state, market = new_player(1), MarketState()
+    state.harvested_crops["Wheat"] = 10 ** 12
+    action = {"name": "Sell", "parameters": ["Wheat", "1"]}
+
+    def run():
+        market.books.clear()
+        state.energy = GAME_RULES["max_energy"]
+        process_action(state, market, action)
+    return run
+
+@benchmark("process_action[Buy plot]")
+def bench_buy_plot():
+    state, market = new_player(1), MarketState()
+    action = {"name": "Buy", "parameters": ["plot"]}
+
+    def run():
+        del state.plots[1:]
+        process_action(state, market, action)
+    return run
+
+@benchmark("process_action[Buy upgrade]")
+def bench_buy_upgrade():
+    state, market = new_player(1), MarketState()
+    action = {"name": "Buy", "parameters": ["Greenhouse"]}
+
+    def run():
+        del state.upgrades[3:]
+        process_action(state, market, action)
+    return run
+
+@benchmark("process_action[BuyCooperative]")
+def bench_buy_cooperative():
+    players, market = [new_player(1), new_player(1)], MarketState()
+    action = {"name": "BuyCooperative", "parameters": ["Irrigation Network"]}
+
+    def run():
+        for state in players:
+            del state.upgrades[3:]
+        apply_player_action(players[0], players, market, action)
+    return run
+
+@benchmark("process_action[Rest]")
+def bench_rest():
+    state, market = new_player(1), MarketState()
+    action = {"name": "Rest", "parameters": [""]}
+    return lambda: process_action(state, market, action)
+
+@benchmark("process_action[invalid]")
+def bench_invalid():
+    state, market = new_player(1), MarketState()
+    action = {"name": "Harvest", "parameters": ["7"]}
+    return lambda: process_action(state, market, action)
+
+# --- Parsing and serialization -------------------------------------------------
+
+@benchmark("parse_action")
+def bench_parse_action():
+    from game_runner import parse_action_text
+    return lambda: parse_action_text("Sell(Wheat, 10, local)")
+
+@benchmark("parse_action_plan[10 actions]")
+def bench_parse_action_plan():
+    from game_runner import parse_action_plan
+    plan = "\n".join(f"{i + 1}. Plant(Wheat, {i + 1})" for i in range(10))
+    return lambda: parse_action_plan(plan, 10)
+
+@benchmark("game_state serialization[100 plots]")
+def bench_game_state():
+    from fastapi.encoders import jsonable_encoder
+    from app import serialize_game_state
+    game_state = {
+        "players": [new_player(100), new_player(100)], "shared_market": MarketState(),
+        "game_log": [f"Day {i}, Player 1: Rest(): Rested and regained some energy" for i in range(200)],
+        "current_day": 50, "game_over": False,
+    }
+    # As done for /game_state: pydantic conversion, then FastAPI's encoder and JSON
+    return lambda: json.dumps(jsonable_encoder(serialize_game_state(game_state)))
+
+@benchmark("game_state serialization[100 plots, cached]")
+def bench_game_state_cached():
+    from app import game_state_body
+    from sessions import GameSession
+    session = GameSession("benchmark")
+    session.game_state.update({"players": [new_player(100), new_player(100)], "shared_market": MarketState()})
+    session.state_version = 1
+    # Polls between two days are answered from the per-version cache
+    return lambda: game_state_body(session)
+
+# --- End to end -----------------------------------------------------------------
+
+class StubAgent:
+    def __init__(self, name, llm_config=None, **kwargs):
+        self.name = name
+
+class StubProxy:
+    """In-process stand-in for UserProxyAgent answering with stub_model's rule."""
+
+    def __init__(self, name, **kwargs):
+        self.name = name
+
+    async def a_initiate_chat(self, agent, message, max_turns):
+        from stub_model import choose_action
+
+        class ChatResult:
+            summary = choose_action(message)
+        return ChatResult()
+
+@benchmark("game_stream[full game]")
+def bench_game_stream():
+    import app
+    import game_runner
+    from fastapi.testclient import TestClient
+    saved = game_runner.AssistantAgent, game_runner.UserProxyAgent, app.game_day_delay
+    game_runner.AssistantAgent, game_runner.UserProxyAgent = StubAgent, StubProxy
+    app.game_day_delay = 0
+    client = TestClient(app.app)
+    client.__enter__()
+
+    def run():
+        start = time.perf_counter()
+        response = client.post("/start_game")
+        run.elapsed += time.perf_counter() - start
+        run.days += response.content.count(b'"day"')
+        run.bytes += len(response.content)
+    def teardown():
+        client.__exit__(None, None, None)
+        game_runner.AssistantAgent, game_runner.UserProxyAgent, app.game_day_delay = saved
+    run.days = run.bytes = 0
+    run.elapsed = 0.0
+    run.teardown = teardown
+    return run
+
+def run_benchmarks(name_filter: str = "", min_time: float = 0.2, repeat: int = 5) -> dict:
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if name_filter not in name:
+            continue
+        func = factory()
+        try:
+            results[name] = measure(func, min_time, repeat)
+        finally:
+            # Benchmarks that patch modules or hold resources undo it here
+            if hasattr(func, "teardown"):
+                func.teardown()
+        if hasattr(func, "days") and func.days:
+            results[name]["days_per_second"] = func.days / func.elapsed
+            results[name]["bytes_per_day"] = func.bytes / func.days
+        print(f"{name:45s} {results[name]['median'] * 1e6:12.2f} us", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10) -> list:
+    """Rows of (name, baseline s, current s, ratio, regressed) for benchmarks present in both."""
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before, after = baseline["results"][name]["median"], result["median"]
+        ratio = after / before
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation, parsing and streaming hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+    run_parser.add_argument("--out", default=None, help="write JSON results here (default: stdout)")
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing round")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio flagged as a regression")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_benchmarks(args.filter, args.min_time, args.repeat)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(results, f, indent=2)
+        else:
+            print(json.dumps(results, indent=2))
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for name, before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:45s} {before * 1e6:12.2f} us {after * 1e6:12.2f} us {ratio:7.2f}x {flag}")
+    if any(row[4] for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
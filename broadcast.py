@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any, AsyncIterator, Optional, Set
+
+DROP_OLDEST = "drop_oldest"  # a slow subscriber skips stale updates
+DISCONNECT = "disconnect"    # a slow subscriber is closed and must resubscribe
+
+_CLOSED = object()
+
+class Subscription:
+    def __init__(self, maxsize: int, policy: str):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+
+    def _put(self, item: Any):
+        # Never blocks: the producer must not wait on any subscriber
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    def offer(self, item: Any) -> bool:
+        """Queue an update; returns False if this subscriber had to be disconnected."""
+        if self.closed:
+            return False
+        if self.queue.full() and self.policy == DISCONNECT:
+            self.close()
+            return False
+        self._put(item)
+        return True
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._put(_CLOSED)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        while True:
+            item = await self.queue.get()
+            if item is _CLOSED:
+                return
+            yield item
+
+class GameBroadcaster:
+    """Fan out one producer's updates to any number of subscribers.
+
+    Exactly one task drives the game through `run()`; the HTTP stream,
+    spectators and loggers each get their own bounded queue. Publishing never
+    waits: when a queue is full the subscriber's backpressure policy decides
+    whether it loses its oldest update or is disconnected. Late joiners start
+    from the most recent update.
+    """
+
+    def __init__(self, queue_size: int = 64, policy: str = DROP_OLDEST):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.subscribers: Set[Subscription] = set()
+        self.latest: Optional[Any] = None
+        self.closed = False
+
+    def subscribe(self, replay_latest: bool = True, policy: Optional[str] = None) -> Subscription:
+        subscription = Subscription(self.queue_size, policy or self.policy)
+        if replay_latest and self.latest is not None:
+            subscription.offer(self.latest)
+        if self.closed:
+            subscription.close()
+        else:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, item: Any):
+        self.latest = item
+        for subscription in list(self.subscribers):
+            if not subscription.offer(item):
+                self.subscribers.discard(subscription)
+
+    def close(self):
+        self.closed = True
+        for subscription in self.subscribers:
+            subscription.close()
+        self.subscribers.clear()
+
+    async def run(self, source: AsyncIterator[Any]):
+        try:
+            async for item in source:
+                self.publish(item)
+        finally:
+            self.close()
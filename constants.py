@@ -42,7 +42,12 @@ GAME_RULES = {
         "local_price_factor": 1.1,
         "global_price_factor": 1.3,
         "max_price_fluctuation": 0.2,
-        "trend_duration": 7  # days
+        "trend_duration": 7,  # days
+        # Sell orders clear at the end of the day against market buyers bidding
+        # at buyer_levels prices spread over +/- max_price_fluctuation
+        "buyer_levels": 5,
+        "buyer_quantity": 4,  # units bid per crop at each price level per day
+        "decay": 0.5  # share of yesterday's supply and demand that still counts
     },
     "upgrades": {
         "Irrigation": {"cost": 500, "water_saving": 0.2},
@@ -0,0 +1,126 @@
+import heapq
+from typing import List, NamedTuple, Optional, Sequence
+import numpy as np
+from entities import MarketState, PlayerState
+from game_logic import get_upgrade_modifiers, process_action, process_day
+from game_rng import GameRNG
+
+# Event-driven crop growth. Between actions a planted plot only changes by
+# the same daily steps (growth by the day's weather, quality by the yield
+# boost, soil by the depletion rate), so a whole run of days can be integrated
+# at once per farm instead of ticking every plot every day. The integration
+# reproduces process_day bit for bit: numpy's cumsum and cumprod accumulate
+# strictly in order like the daily loop, and the caps (growth at 1, soil at 0)
+# are applied afterwards, which is exact because both sequences are monotone.
+
+MATURITY = "maturity"
+SOIL_EXHAUSTED = "soil_exhausted"
+
+REST_ACTION = {"name": "Rest", "parameters": [""]}
+
+class CropEvent(NamedTuple):
+    day: int
+    kind: str
+    player: int
+    plot: int
+
+class FarmTrajectory:
+    """Every planted plot of one farm over a run of days, uncapped; row k is the state after k days."""
+
+    def __init__(self, state: PlayerState, weather_ids: np.ndarray):
+        rules = state.rules
+        self.plots = [i for i, plot in enumerate(state.plots) if plot.crop is not None]
+        days = len(weather_ids)
+        crops = [state.plots[i].crop for i in self.plots]
+        crop_ids = np.array([rules.crop_index[crop.type] for crop in crops], dtype=np.int64)
+
+        modifiers = get_upgrade_modifiers(state)
+        growth_rates = rules.arrays.weather_growth[weather_ids]
+        if modifiers.weather_protection > 0:
+            growth_rates = np.maximum(growth_rates, 1.0)
+        growth_rates = growth_rates * (1 + modifiers.water_saving)
+
+        progress = np.empty((days + 1, len(crops)))
+        progress[0] = [crop.growth_progress for crop in crops]
+        progress[1:] = growth_rates[:, None] / rules.arrays.crop_growth_time[crop_ids][None, :]
+        self.progress = np.cumsum(progress, axis=0)
+
+        quality = np.empty((days + 1, len(crops)))
+        quality[0] = [crop.quality for crop in crops]
+        quality[1:] = 1 + modifiers.yield_boost
+        self.quality = np.cumprod(quality, axis=0)
+
+        soil = np.empty((days + 1, len(crops)))
+        soil[0] = [state.plots[i].soil_quality for i in self.plots]
+        soil[1:] = -rules.soil_depletion_rate
+        self.soil = np.cumsum(soil, axis=0)
+
+    def events(self, player: int, first_day: int) -> List[CropEvent]:
+        """The day each plot's crop matures and its soil runs out, if within the run."""
+        events = []
+        for kind, reached in ((MATURITY, self.progress >= 1.0), (SOIL_EXHAUSTED, self.soil <= 0)):
+            # Plots already there at the start have no event
+            pending = ~reached[0]
+            first = reached[1:].argmax(axis=0)
+            for column in np.flatnonzero(pending & reached[1:].any(axis=0)):
+                events.append(CropEvent(first_day + int(first[column]), kind, player, self.plots[column]))
+        return events
+
+    def apply(self, state: PlayerState, days: int):
+        """Write the plots' state after `days` days back onto `state`."""
+        plots = state.writable_plots()
+        for column, i in enumerate(self.plots):
+            plot = plots[i]
+            plot.crop.growth_progress = min(1.0, float(self.progress[days, column]))
+            plot.crop.quality = float(self.quality[days, column])
+            soil = float(self.soil[days, column])
+            # max(0, soil) in the daily loop keeps the integer 0 once the soil is used up
+            plot.soil_quality = soil if soil > 0 else 0
+
+class CropSchedule:
+    """Crop growth of every farm over the days first_day .. first_day + days - 1, with its event queue."""
+
+    def __init__(self, players: Sequence[PlayerState], rng: GameRNG, first_day: int, days: int):
+        self.first_day = first_day
+        self.days = days
+        weather_ids = rng.weather_ids[first_day:first_day + days]
+        self.farms = [FarmTrajectory(state, weather_ids) for state in players]
+        self.events: List[CropEvent] = []
+        for player, farm in enumerate(self.farms):
+            self.events.extend(farm.events(player, first_day))
+        heapq.heapify(self.events)
+
+    def next_event_day(self, kinds: Sequence[str] = (MATURITY, SOIL_EXHAUSTED)) -> Optional[int]:
+        """The first day on which one of `kinds` happens, or None if none does in the schedule."""
+        return min((event.day for event in self.events if event.kind in kinds), default=None)
+
+    def pop_events(self, through_day: int) -> List[CropEvent]:
+        """Remove and return, in day order, the events up to and including `through_day`."""
+        events = []
+        while self.events and self.events[0].day <= through_day:
+            events.append(heapq.heappop(self.events))
+        return events
+
+    def apply(self, players: Sequence[PlayerState], days: int):
+        for state, farm in zip(players, self.farms):
+            farm.apply(state, days)
+
+def fast_forward(players: Sequence[PlayerState], shared_market: MarketState, rng: GameRNG, days: int,
+                 rest: bool = True, schedule: Optional[CropSchedule] = None) -> List[CropEvent]:
+    """Play the next `days` days in one go, exactly as `days` calls of process_day would.
+
+    With `rest`, every player also takes a Rest action each day, as the day
+    loop would apply it. The market, weather, trends and energy still advance
+    day by day, which costs a few operations per player; the plots are only
+    touched once, at the end. Returns the crop events of the skipped days.
+    """
+    first_day = players[0].day + 1
+    if schedule is None or schedule.first_day != first_day or schedule.days < days:
+        schedule = CropSchedule(players, rng, first_day, days)
+    for _ in range(days):
+        process_day(players, shared_market, rng=rng, grow_crops=False)
+        if rest:
+            for state in players:
+                process_action(state, shared_market, REST_ACTION)
+    schedule.apply(players, days)
+    return schedule.pop_events(first_day + days - 1)
@@ -0,0 +1,131 @@
+import json
+from collections import deque
+from typing import List, NamedTuple, Optional
+
+class DayUpdate(NamedTuple):
+    """What a game's producer publishes each day: the legacy JSON payload and the SSE delta event."""
+    json: str
+    event: dict
+
+def _plot_key(plot) -> tuple:
+    crop = plot.crop
+    if crop is None:
+        return (plot.soil_quality, None)
+    return (plot.soil_quality, (crop.type, crop.growth_progress, crop.quality))
+
+def _plot_data(key: tuple) -> dict:
+    soil_quality, crop = key
+    if crop is None:
+        return {"soil_quality": soil_quality, "crop": None}
+    crop_type, growth_progress, quality = crop
+    return {"soil_quality": soil_quality, "crop": {"type": crop_type, "growth_progress": growth_progress, "quality": quality}}
+
+class DeltaEncoder:
+    """Turn successive run_game updates into per-day deltas.
+
+    Each delta only carries what changed since the previous day: new game log
+    and action log lines, changed plots, and money/energy/crop/upgrade fields
+    whose value differs. Applying the deltas in order rebuilds the full state.
+    """
+
+    def __init__(self):
+        self._game_log_length = 0
+        self._action_log_lengths: List[int] = []
+        self._plots: List[List[tuple]] = []
+        self._fields: List[dict] = []
+        self._world: dict = {}
+
+    def encode(self, update: dict) -> tuple:
+        """Return (event type, data) for one update yielded by run_game."""
+        if update.get("game_over"):
+            return "game_over", {key: update[key] for key in ("day", "winner", "scores") if key in update}
+
+        data = {"day": update["day"]}
+        game_log = update.get("game_log", [])
+        data["game_log"] = game_log[self._game_log_length:]
+        self._game_log_length = len(game_log)
+
+        players = update.get("players", [])
+        if players:
+            world = {"season": players[0].season, "weather": players[0].weather}
+            changed = {k: v for k, v in world.items() if self._world.get(k) != v}
+            if changed:
+                data.update(changed)
+                self._world = world
+
+        actions = update.get("actions", [])
+        player_deltas = []
+        for player, state in enumerate(players):
+            if player == len(self._fields):
+                self._action_log_lengths.append(0)
+                self._plots.append([])
+                self._fields.append({})
+            player_delta = {}
+            action = actions[player] if player < len(actions) else None
+            if action:
+                player_delta["action"] = action
+
+            action_log = state.action_log
+            new_lines = action_log[self._action_log_lengths[player]:]
+            if new_lines:
+                player_delta["action_log"] = list(new_lines)
+            self._action_log_lengths[player] = len(action_log)
+
+            fields = {
+                "money": state.money,
+                "energy": state.energy,
+                "invalid_action_count": state.invalid_action_count,
+                "harvested_crops": dict(state.harvested_crops),
+                "upgrades": list(state.upgrades),
+            }
+            previous_fields = self._fields[player]
+            for key, value in fields.items():
+                if previous_fields.get(key) != value:
+                    player_delta[key] = value
+            self._fields[player] = fields
+
+            plots = [_plot_key(plot) for plot in state.plots]
+            previous_plots = self._plots[player]
+            changed_plots = {
+                str(i): _plot_data(key) for i, key in enumerate(plots)
+                if i >= len(previous_plots) or previous_plots[i] != key
+            }
+            if changed_plots:
+                player_delta["plots"] = changed_plots
+            if len(plots) != len(previous_plots):
+                player_delta["plot_count"] = len(plots)
+            self._plots[player] = plots
+
+            player_deltas.append(player_delta)
+        if player_deltas:
+            data["players"] = player_deltas
+        return "day", data
+
+class EventHistory:
+    """Bounded, id-numbered history of a game's SSE events for Last-Event-ID resume."""
+
+    def __init__(self, maxlen: int = 1000, last_id: int = 0):
+        self.events = deque(maxlen=maxlen)
+        self.last_id = last_id
+
+    def append(self, event_type: str, data: dict) -> dict:
+        self.last_id += 1
+        event = {"id": str(self.last_id), "event": event_type, "data": json.dumps(data)}
+        self.events.append(event)
+        return event
+
+    def since(self, last_id: int) -> Optional[List[dict]]:
+        """Events after `last_id`, or None if some of them are no longer retained."""
+        first_retained = self.last_id - len(self.events) + 1
+        if last_id + 1 < first_retained:
+            return None
+        return [event for event in self.events if int(event["id"]) > last_id]
+
+def snapshot_event(game_state: dict, event_id: int) -> dict:
+    """A full-state event for clients too far behind to catch up from deltas."""
+    data = {"day": game_state.get("day", game_state.get("current_day"))}
+    players = game_state.get("players")
+    if players:
+        data["players"] = [state.to_model().model_dump() for state in players]
+    data["game_log"] = list(game_state.get("game_log", []))
+    return {"id": str(event_id), "event": "snapshot", "data": json.dumps(data)}
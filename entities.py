@@ -1,5 +1,20 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from pydantic import BaseModel, ConfigDict
+from ring_log import RingLog
+from market import OrderBook
+from rules import RULES, CompiledRules
+
+def _plot_status_lines(plots) -> List[str]:
+    status = []
+    for i, plot in enumerate(plots, start=1):
+        if plot.crop is None:
+            status.append(f"Plot {i}: Vacant")
+        else:
+            crop = plot.crop
+            growth_percentage = min(100, crop.growth_progress * 100)
+            maturity = "Mature" if crop.growth_progress >= 1.0 else "Growing"
+            status.append(f"Plot {i}: {crop.type} ({maturity}, {growth_percentage:.1f}% grown)")
+    return status
 
 class Crop(BaseModel):
     type: str
@@ -18,8 +33,8 @@ class Plot(BaseModel):
         return self.crop is None
 
 class SharedMarket(BaseModel):
-    supply: Dict[str, int] = {}
-    demand: Dict[str, int] = {}
+    supply: Dict[str, float] = {}
+    demand: Dict[str, float] = {}
 
 class GameState(BaseModel):
     day: int = 1
@@ -35,17 +50,210 @@ class GameState(BaseModel):
     action_log: List[str] = []  # Add this line to store the player's action log
 
     def get_plot_status(self, game_rules: dict) -> List[str]:
-        status = []
-        for i, plot in enumerate(self.plots, start=1):
-            if plot.crop is None:
-                status.append(f"Plot {i}: Vacant")
-            else:
-                crop = plot.crop
-                growth_percentage = min(100, crop.growth_progress * 100)
-                maturity = "Mature" if crop.growth_progress >= 1.0 else "Growing"
-                status.append(f"Plot {i}: {crop.type} ({maturity}, {growth_percentage:.1f}% grown)")
-        return status
+        return _plot_status_lines(self.plots)
 
 class Action(BaseModel):
     type: str
-    details: Dict[str, Any] = {}
\ No newline at end of file
+    details: Dict[str, Any] = {}
+
+# Slotted counterparts of the models above, used by the simulation core.
+# Attribute access and construction skip pydantic validation entirely; the
+# pydantic models are only built at the API boundary via to_model().
+
+class CropState:
+    __slots__ = ("type", "planted_at", "growth_progress", "quality")
+
+    def __init__(self, type: str, planted_at: int, growth_progress: float = 0, quality: float = 1.0):
+        self.type = type
+        self.planted_at = planted_at
+        self.growth_progress = growth_progress
+        self.quality = quality
+
+    def clone(self) -> "CropState":
+        return CropState(self.type, self.planted_at, self.growth_progress, self.quality)
+
+    def is_mature(self, current_day: int, base_growth_time: int) -> bool:
+        return (current_day - self.planted_at) >= base_growth_time
+
+    @classmethod
+    def from_model(cls, crop: Crop) -> "CropState":
+        return cls(crop.type, crop.planted_at, crop.growth_progress, crop.quality)
+
+    def to_model(self) -> Crop:
+        return Crop.model_construct(type=self.type, planted_at=self.planted_at,
+                                    growth_progress=self.growth_progress, quality=self.quality)
+
+class PlotState:
+    __slots__ = ("soil_quality", "crop")
+
+    def __init__(self, soil_quality: float = 1.0, crop: Optional[CropState] = None):
+        self.soil_quality = soil_quality
+        self.crop = crop
+
+    def is_vacant(self) -> bool:
+        return self.crop is None
+
+    def clone(self) -> "PlotState":
+        return PlotState(self.soil_quality, self.crop.clone() if self.crop is not None else None)
+
+    @classmethod
+    def from_model(cls, plot: Plot) -> "PlotState":
+        return cls(plot.soil_quality, CropState.from_model(plot.crop) if plot.crop is not None else None)
+
+    def to_model(self) -> Plot:
+        return Plot.model_construct(soil_quality=self.soil_quality,
+                                    crop=self.crop.to_model() if self.crop is not None else None)
+
+class MarketState:
+    __slots__ = ("supply", "demand", "books", "next_order_id", "rules")
+
+    def __init__(self, supply: Optional[Dict[str, float]] = None, demand: Optional[Dict[str, float]] = None,
+                 books: Optional[Dict[str, OrderBook]] = None, next_order_id: int = 0,
+                 rules: CompiledRules = RULES):
+        # Decayed volumes offered and bid per crop; open orders live in the books
+        self.supply = {} if supply is None else supply
+        self.demand = {} if demand is None else demand
+        self.books = {} if books is None else books
+        self.next_order_id = next_order_id
+        # The game's rules; every state of one game shares the same object
+        self.rules = rules
+
+    def clone(self, players: Sequence["PlayerState"], clones: Sequence["PlayerState"]) -> "MarketState":
+        """A copy whose open orders belong to `clones` wherever they belonged to `players`."""
+        owners = {id(state): clone for state, clone in zip(players, clones)}
+        books = {crop_type: book.clone(owners) for crop_type, book in self.books.items() if book.asks or book.bids}
+        return MarketState(dict(self.supply), dict(self.demand), books, self.next_order_id, self.rules)
+
+    def to_dict(self, players: Sequence["PlayerState"]) -> dict:
+        # Order owners are stored as their index in `players`
+        return {
+            "supply": dict(self.supply), "demand": dict(self.demand), "next_order_id": self.next_order_id,
+            "asks": {crop_type: [[price, order_id, players.index(owner), quantity, tag]
+                                 for price, order_id, owner, quantity, tag in book.asks]
+                     for crop_type, book in self.books.items() if book.asks},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, players: Sequence["PlayerState"], rules: CompiledRules = RULES) -> "MarketState":
+        books = {}
+        for crop_type, asks in data.get("asks", {}).items():
+            book = books[crop_type] = OrderBook()
+            for price, order_id, owner, quantity, tag in asks:
+                book.add_ask(price, order_id, players[owner], quantity, tag)
+        return cls(dict(data["supply"]), dict(data["demand"]), books, data.get("next_order_id", 0), rules)
+
+    @classmethod
+    def from_model(cls, market: SharedMarket) -> "MarketState":
+        return cls(dict(market.supply), dict(market.demand))
+
+    def to_model(self) -> SharedMarket:
+        return SharedMarket.model_construct(supply=dict(self.supply), demand=dict(self.demand))
+
+class PlayerState:
+    __slots__ = ("day", "season", "weather", "money", "energy", "plots", "harvested_crops",
+                 "upgrades", "market_trends", "invalid_action_count", "action_log", "upgrade_modifiers",
+                 "shared_plots", "rules")
+
+    def __init__(self, day: int = 1, season: str = "Spring", weather: str = "Sunny", money: float = 0,
+                 energy: float = 0, plots: Optional[List[PlotState]] = None,
+                 harvested_crops: Optional[Dict[str, int]] = None, upgrades: Optional[List[str]] = None,
+                 market_trends: Optional[Dict[str, float]] = None, invalid_action_count: int = 0,
+                 action_log: Optional[RingLog] = None, rules: CompiledRules = RULES):
+        self.day = day
+        self.season = season
+        self.weather = weather
+        self.money = money
+        self.energy = energy
+        self.plots = [PlotState()] if plots is None else plots
+        self.harvested_crops = {} if harvested_crops is None else harvested_crops
+        self.upgrades = [] if upgrades is None else upgrades
+        self.market_trends = {} if market_trends is None else market_trends
+        self.invalid_action_count = invalid_action_count
+        self.action_log = RingLog() if action_log is None else action_log
+        # Cached rules.UpgradeModifiers for `upgrades`; None until first computed.
+        # game_logic resets it whenever it changes the upgrade list.
+        self.upgrade_modifiers = None
+        # True while `plots` may be shared with a clone; see writable_plots()
+        self.shared_plots = False
+        self.rules = rules
+
+    def clone(self, keep_action_log: bool = True) -> "PlayerState":
+        """A copy for lookahead that shares everything it safely can with this state.
+
+        The plot list is shared copy-on-write: whichever side changes a plot
+        first copies the list via writable_plots(). The upgrade list and market
+        trends are only ever replaced, never changed in place, so they are
+        shared outright. Without `keep_action_log` the clone logs nothing.
+        """
+        clone = PlayerState(
+            day=self.day, season=self.season, weather=self.weather, money=self.money, energy=self.energy,
+            plots=self.plots, harvested_crops=dict(self.harvested_crops), upgrades=self.upgrades,
+            market_trends=self.market_trends, invalid_action_count=self.invalid_action_count,
+            action_log=self.action_log.copy() if keep_action_log else RingLog(window=0), rules=self.rules,
+        )
+        clone.upgrade_modifiers = self.upgrade_modifiers
+        clone.shared_plots = self.shared_plots = True
+        return clone
+
+    def writable_plots(self) -> List[PlotState]:
+        """The plot list, copied first if it may still be shared with a clone."""
+        if self.shared_plots:
+            self.plots = [plot.clone() for plot in self.plots]
+            self.shared_plots = False
+        return self.plots
+
+    def get_plot_status(self, game_rules: dict) -> List[str]:
+        return _plot_status_lines(self.plots)
+
+    @classmethod
+    def from_model(cls, state: GameState) -> "PlayerState":
+        return cls(
+            day=state.day, season=state.season, weather=state.weather, money=state.money,
+            energy=state.energy, plots=[PlotState.from_model(plot) for plot in state.plots],
+            harvested_crops=dict(state.harvested_crops), upgrades=list(state.upgrades),
+            market_trends=dict(state.market_trends), invalid_action_count=state.invalid_action_count,
+            action_log=RingLog(state.action_log),
+        )
+
+    def to_dict(self) -> dict:
+        """Plain JSON-ready dict of the full state, e.g. for journal snapshots."""
+        return {
+            "day": self.day, "season": self.season, "weather": self.weather, "money": self.money,
+            "energy": self.energy,
+            "plots": [
+                {"soil_quality": plot.soil_quality,
+                 "crop": None if plot.crop is None else {
+                     "type": plot.crop.type, "planted_at": plot.crop.planted_at,
+                     "growth_progress": plot.crop.growth_progress, "quality": plot.crop.quality}}
+                for plot in self.plots
+            ],
+            "harvested_crops": dict(self.harvested_crops), "upgrades": list(self.upgrades),
+            "market_trends": dict(self.market_trends), "invalid_action_count": self.invalid_action_count,
+            "action_log": list(self.action_log),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, action_log: Optional[RingLog] = None, rules: CompiledRules = RULES) -> "PlayerState":
+        if action_log is None:
+            action_log = RingLog()
+        action_log.extend(data["action_log"])
+        return cls(
+            day=data["day"], season=data["season"], weather=data["weather"], money=data["money"],
+            energy=data["energy"],
+            plots=[PlotState(plot["soil_quality"], None if plot["crop"] is None else CropState(**plot["crop"]))
+                   for plot in data["plots"]],
+            harvested_crops=dict(data["harvested_crops"]), upgrades=list(data["upgrades"]),
+            market_trends=dict(data["market_trends"]), invalid_action_count=data["invalid_action_count"],
+            action_log=action_log, rules=rules,
+        )
+
+    def to_model(self) -> GameState:
+        # model_construct keeps fractional money/energy exactly as the core produced
+        # them; the action log carries the in-memory window of the ring log
+        return GameState.model_construct(
+            day=self.day, season=self.season, weather=self.weather, money=self.money,
+            energy=self.energy, plots=[plot.to_model() for plot in self.plots],
+            harvested_crops=dict(self.harvested_crops), upgrades=list(self.upgrades),
+            market_trends=dict(self.market_trends), invalid_action_count=self.invalid_action_count,
+            action_log=list(self.action_log),
+        )
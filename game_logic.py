@@ -1,28 +1,47 @@
+import logging
 import random
-from entities import GameState, Action, SharedMarket, Plot, Crop
-from constants import GAME_RULES
+from typing import Dict, Optional, Sequence
+from entities import PlayerState, Action, MarketState, PlotState, CropState
+from rules import RULES, CompiledRules
+from game_rng import GameRNG
+from market import OrderBook
 
-def get_season(day: int) -> str:
-    num_seasons = len(GAME_RULES["seasons"])
-    return GAME_RULES["seasons"][((day - 1) // 30) % num_seasons]
+logger = logging.getLogger(__name__)
 
-def get_weather(season: str) -> str:
-    return random.choices(GAME_RULES["weather_types"], GAME_RULES["weather_probabilities"][season])[0]
+def get_season(day: int, rules: CompiledRules = RULES) -> str:
+    return rules.seasons[rules.season_for_day(day)]
 
-def update_market_trends(state: GameState):
-    if state.day % GAME_RULES["market"]["trend_duration"] == 1:
-        state.market_trends = {crop: random.uniform(0.8, 1.2) for crop in GAME_RULES["crops"]}
+def get_weather(season: str, rules: CompiledRules = RULES) -> str:
+    return random.choices(rules.weather_types, rules.weather_probabilities[rules.season_index[season]])[0]
 
-def apply_invalid_action_penalty(state: GameState, reason: str) -> str:
+def update_market_trends(state: PlayerState, market_trends: Optional[Dict[str, float]] = None):
+    rules = state.rules
+    if state.day % rules.trend_duration == 1:
+        if market_trends is None:
+            market_trends = {crop: random.uniform(0.8, 1.2) for crop in rules.crop_types}
+        state.market_trends = market_trends
+
+def get_upgrade_modifiers(state: PlayerState):
+    if state.upgrade_modifiers is None:
+        state.upgrade_modifiers = state.rules.upgrade_modifiers(state.upgrades)
+    return state.upgrade_modifiers
+
+def add_upgrade(state: PlayerState, upgrade_type: str):
+    # Rebound rather than appended to, since clones share the list
+    state.upgrades = state.upgrades + [upgrade_type]
+    state.upgrade_modifiers = state.rules.upgrade_modifiers(state.upgrades)
+
+def apply_invalid_action_penalty(state: PlayerState, reason: str) -> str:
     state.invalid_action_count += 1
-    state.money = max(0, state.money - GAME_RULES["invalid_action_penalty"])
+    state.money = max(0, state.money - state.rules.invalid_action_penalty)
     return f"Invalid action: {reason}. Penalty applied. Current invalid actions: {state.invalid_action_count}"
 
-def plant_crop(state: GameState, action: Action) -> str:
+def plant_crop(state: PlayerState, action: Action) -> str:
+    rules = state.rules
     crop_type = action.details["crop_type"]
     plot_index = action.details["plot_index"] - 1  # Convert to 0-based index
     
-    print(f"Attempting to plant {crop_type} on plot {plot_index + 1}. Total plots: {len(state.plots)}")
+    logger.debug(f"Attempting to plant {crop_type} on plot {plot_index + 1}. Total plots: {len(state.plots)}")
     
     if plot_index < 0 or plot_index >= len(state.plots):
         return apply_invalid_action_penalty(state, f"Invalid plot number. You have {len(state.plots)} plot(s).")
@@ -30,28 +49,31 @@ def plant_crop(state: GameState, action: Action) -> str:
     if state.plots[plot_index].crop is not None:
         return apply_invalid_action_penalty(state, f"Plot {plot_index + 1} is not vacant")
     
-    crop_cost = GAME_RULES["crops"][crop_type]["cost"]
-    energy_cost = GAME_RULES["energy_cost"]["plant"][crop_type]
+    crop_id = rules.crop_index[crop_type]
+    crop_cost = rules.crop_cost[crop_id]
+    energy_cost = rules.plant_energy[crop_id]
     
     if state.money < crop_cost or state.energy < energy_cost:
         return apply_invalid_action_penalty(state, "Insufficient resources for planting")
     
     state.money -= crop_cost
     state.energy -= energy_cost
-    state.plots[plot_index].crop = Crop(type=crop_type, planted_at=state.day)
-    state.plots[plot_index].soil_quality -= GAME_RULES["soil_quality"]["depletion_rate"]
+    plot = state.writable_plots()[plot_index]
+    plot.crop = CropState(crop_type, state.day)
+    plot.soil_quality -= rules.soil_depletion_rate
     
     return f"Planted {crop_type} in plot {plot_index + 1}"
 
-def harvest_crop(state: GameState, action: Action) -> str:
+def harvest_crop(state: PlayerState, action: Action) -> str:
+    rules = state.rules
     plot_index = action.details["plot_index"] - 1  # Convert to 0-based index
     
     if plot_index < 0 or plot_index >= len(state.plots) or state.plots[plot_index].crop is None:
         return apply_invalid_action_penalty(state, f"No crop to harvest in plot {plot_index + 1}")
     
     crop = state.plots[plot_index].crop
-    crop_info = GAME_RULES["crops"][crop.type]
-    energy_cost = GAME_RULES["energy_cost"]["harvest"][crop.type]
+    crop_id = rules.crop_index[crop.type]
+    energy_cost = rules.harvest_energy[crop_id]
     
     if state.energy < energy_cost:
         return apply_invalid_action_penalty(state, "Insufficient energy for harvesting")
@@ -61,112 +83,147 @@ def harvest_crop(state: GameState, action: Action) -> str:
     
     state.energy -= energy_cost
     
-    base_yield = crop_info["base_yield"]
-    weather_factor = GAME_RULES["weather_effects"][state.weather]["yield"]
-    soil_factor = 1 + (state.plots[plot_index].soil_quality - 1) * GAME_RULES["soil_quality"]["yield_factor"]
+    base_yield = rules.crop_base_yield[crop_id]
+    weather_factor = rules.weather_yield[rules.weather_index[state.weather]]
+    soil_factor = 1 + (state.plots[plot_index].soil_quality - 1) * rules.soil_yield_factor
     total_yield = int(base_yield * weather_factor * soil_factor * crop.quality)
     
     state.harvested_crops[crop.type] = state.harvested_crops.get(crop.type, 0) + total_yield
-    state.plots[plot_index].crop = None
+    state.writable_plots()[plot_index].crop = None
     
     return f"Harvested {total_yield} {crop.type} from plot {plot_index + 1}"
 
-def perform_maintenance(state: GameState, action: Action) -> str:
+def perform_maintenance(state: PlayerState, action: Action) -> str:
+    rules = state.rules
     maintenance_type = action.details["maintenance_type"]
     plot_index = action.details["plot_index"] - 1  # Convert to 0-based index
     
     if plot_index < 0 or plot_index >= len(state.plots):
         return apply_invalid_action_penalty(state, f"Invalid plot number. You have {len(state.plots)} plot(s).")
     
-    energy_cost = GAME_RULES["energy_cost"]["maintenance"][maintenance_type]
+    energy_cost = rules.maintenance_energy[rules.maintenance_index[maintenance_type]]
     
     if state.energy < energy_cost:
         return apply_invalid_action_penalty(state, "Insufficient energy for maintenance")
     
     state.energy -= energy_cost
-    state.plots[plot_index].soil_quality = min(1.0, state.plots[plot_index].soil_quality + GAME_RULES["soil_quality"]["maintenance_improvement"])
+    plot = state.writable_plots()[plot_index]
+    plot.soil_quality = min(1.0, plot.soil_quality + rules.soil_maintenance_improvement)
     
-    if state.plots[plot_index].crop:
-        state.plots[plot_index].crop.quality *= 1.1  # Improve crop quality
+    if plot.crop:
+        plot.crop.quality *= 1.1  # Improve crop quality
     
     return f"Performed {maintenance_type} maintenance on plot {plot_index + 1}"
 
-def update_shared_market(market: SharedMarket, action: Action):
-    if action.type == "sell":
-        crop_type = action.details["crop_type"]
-        amount = action.details["amount"]
-        market.supply[crop_type] = market.supply.get(crop_type, 0) + amount
-    elif action.type == "buy":
-        crop_type = action.details["crop_type"]
-        amount = action.details["amount"]
-        market.demand[crop_type] = market.demand.get(crop_type, 0) + amount
-
-def calculate_market_price(market: SharedMarket, crop_type: str, base_price: float) -> float:
+def calculate_market_price(market: MarketState, crop_type: str, base_price: float) -> float:
+    rules = market.rules
     supply = market.supply.get(crop_type, 0)
     demand = market.demand.get(crop_type, 0)
-    price_factor = 1 + (demand - supply) / 100  # Adjust this formula as needed
+    price_factor = 1 + (demand - supply) / 100
+    # Recent volumes move the price by at most max_price_fluctuation either way
+    price_factor = min(max(price_factor, 1 - rules.max_price_fluctuation), 1 + rules.max_price_fluctuation)
     return base_price * price_factor
 
-def buy_cooperative_upgrade(state: GameState, other_state: GameState, action: Action) -> str:
+def place_sell_order(market: MarketState, state: PlayerState, crop_type: str, amount: int, market_id: int):
+    book = market.books.get(crop_type)
+    if book is None:
+        book = market.books[crop_type] = OrderBook()
+    # Players sell at whatever the day's clearing price is (price 0 never blocks a match)
+    book.add_ask(0.0, market.next_order_id, state, amount, market_id)
+    market.next_order_id += 1
+
+def clear_market(market: MarketState):
+    """End-of-day call auction for every crop.
+
+    The day's sell orders are matched in price-time priority against the
+    market's buyers, who bid `buyer_quantity` units at each of the buyer price
+    levels around the crop's current price. Every fill pays the uniform
+    clearing price and unsold crops go back to their owners. Supply and demand
+    then decay and take in the day's volumes, which sets tomorrow's price.
+    """
+    rules = market.rules
+    for crop_id, crop_type in enumerate(rules.crop_types):
+        book = market.books.get(crop_type)
+        offered = book.ask_quantity() if book is not None else 0
+        if offered:
+            reference_price = calculate_market_price(market, crop_type, rules.crop_base_price[crop_id])
+            for offset in rules.buyer_price_offsets:
+                book.add_bid(reference_price * (1 + offset), market.next_order_id, None, rules.buyer_quantity)
+                market.next_order_id += 1
+            fills, price = book.match()
+            sold: Dict[tuple, int] = {}
+            for seller, market_id, _, quantity in fills:
+                sold[seller, market_id] = sold.get((seller, market_id), 0) + quantity
+            for (seller, market_id), quantity in sold.items():
+                total_price = int(price * rules.market_price_factor[market_id] * quantity)
+                seller.money += total_price
+                seller.action_log.append(f"Day {seller.day}: Market - Sold {quantity} {crop_type} for {total_price} money")
+            for seller, _, quantity in book.clear():
+                seller.harvested_crops[crop_type] += quantity
+                seller.action_log.append(f"Day {seller.day}: Market - {quantity} {crop_type} unsold and returned")
+        market.supply[crop_type] = market.supply.get(crop_type, 0) * rules.market_decay + offered
+        market.demand[crop_type] = (market.demand.get(crop_type, 0) * rules.market_decay
+                                    + rules.buyer_quantity * len(rules.buyer_price_offsets))
+
+def buy_cooperative_upgrade(players: Sequence[PlayerState], action: Action) -> str:
+    rules = players[0].rules
     upgrade_type = action.details["upgrade_type"]
-    if upgrade_type not in GAME_RULES["cooperative_upgrades"]:
+    if upgrade_type not in rules.cooperative_upgrades:
         return "Invalid cooperative upgrade"
     
-    upgrade_cost = GAME_RULES["cooperative_upgrades"][upgrade_type]["cost"]
-    if state.money < upgrade_cost / 2 or other_state.money < upgrade_cost / 2:
+    # Every player in the game contributes an equal share and gets the upgrade
+    share = rules.upgrade_cost[rules.upgrade_index[upgrade_type]] / len(players)
+    if any(state.money < share for state in players):
         return "Insufficient funds for cooperative upgrade"
     
-    state.money -= upgrade_cost / 2
-    other_state.money -= upgrade_cost / 2
-    state.upgrades.append(upgrade_type)
-    other_state.upgrades.append(upgrade_type)
+    for state in players:
+        state.money -= share
+        add_upgrade(state, upgrade_type)
     
     return f"Purchased cooperative upgrade: {upgrade_type}"
 
-def sell_crops(state: GameState, shared_market: SharedMarket, action: Action) -> str:
+def sell_crops(state: PlayerState, shared_market: MarketState, action: Action) -> str:
+    rules = state.rules
     crop_type = action.details["crop_type"]
     amount = action.details["amount"]
     market_type = action.details["market_type"]
     
+    if amount <= 0:
+        return apply_invalid_action_penalty(state, "Sell amount must be positive")
     if crop_type not in state.harvested_crops or state.harvested_crops[crop_type] < amount:
         return apply_invalid_action_penalty(state, "Insufficient crops for sale")
     
-    energy_cost = GAME_RULES["energy_cost"]["trade"][market_type]
+    market_id = rules.market_index[market_type]
+    energy_cost = rules.trade_energy[market_id]
     
     if state.energy < energy_cost:
         return apply_invalid_action_penalty(state, "Insufficient energy for trading")
     
     state.energy -= energy_cost
     
-    base_price = GAME_RULES["crops"][crop_type]["base_price"]
-    market_price = calculate_market_price(shared_market, crop_type, base_price)
-    price_factor = GAME_RULES["market"]["local_price_factor"] if market_type == "local" else GAME_RULES["market"]["global_price_factor"]
-    total_price = int(market_price * price_factor * amount)
-    
-    state.money += total_price
+    # The crops are held by the order until the market clears at the end of the day
     state.harvested_crops[crop_type] -= amount
+    place_sell_order(shared_market, state, crop_type, amount, market_id)
     
-    # Update shared market
-    update_shared_market(shared_market, action)
-    
-    return f"Sold {amount} {crop_type} for {total_price} money in the {market_type} market"
+    return f"Offered {amount} {crop_type} in the {market_type} market, to be sold at the end of the day"
 
-def buy_item(state: GameState, action: Action) -> str:
+def buy_item(state: PlayerState, action: Action) -> str:
+    rules = state.rules
     item_type = action.details["item_type"]
     
     if item_type == "plot":
         current_plots = len(state.plots)
-        cost = GAME_RULES["plot_purchase"]["base_cost"] * (GAME_RULES["plot_purchase"]["cost_increase_factor"] ** current_plots)
+        cost = rules.plot_cost(current_plots)
         
         if state.money < cost:
             return apply_invalid_action_penalty(state, f"Insufficient funds to buy a new plot. Cost: {cost}, Available: {state.money}")
         
         state.money -= cost
-        state.plots.append(Plot())
+        state.writable_plots().append(PlotState())
         return f"Purchased a new plot for {cost}. Total plots: {len(state.plots)}"
     
-    elif item_type in GAME_RULES["upgrades"]:
-        upgrade_cost = GAME_RULES["upgrades"][item_type]["cost"]
+    elif item_type in rules.individual_upgrades:
+        upgrade_cost = rules.upgrade_cost[rules.upgrade_index[item_type]]
         
         if item_type in state.upgrades:
             return apply_invalid_action_penalty(state, "Upgrade already purchased")
@@ -175,84 +232,88 @@ def buy_item(state: GameState, action: Action) -> str:
             return apply_invalid_action_penalty(state, "Insufficient money for upgrade")
         
         state.money -= upgrade_cost
-        state.upgrades.append(item_type)
+        add_upgrade(state, item_type)
         
         return f"Purchased {item_type} upgrade"
     
     else:
         return apply_invalid_action_penalty(state, f"Unknown item to buy: {item_type}")
 
-def process_day(player1_state: GameState, player2_state: GameState, shared_market: SharedMarket):
-    player1_state.day += 1
-    player2_state.day += 1
-    
-    season = get_season(player1_state.day)
-    player1_state.season = season
-    player2_state.season = season
-    
-    weather = get_weather(season)
-    player1_state.weather = weather
-    player2_state.weather = weather
-    
-    player1_state.energy = min(player1_state.energy + GAME_RULES["energy_regen_per_day"], GAME_RULES["max_energy"])
-    player2_state.energy = min(player2_state.energy + GAME_RULES["energy_regen_per_day"], GAME_RULES["max_energy"])
-    
-    update_market_trends(player1_state)
-    update_market_trends(player2_state)
-    
-    # Apply upgrade effects and process crop growth for both players
-    process_player_state(player1_state)
-    process_player_state(player2_state)
+def process_day(players: Sequence[PlayerState], shared_market: MarketState,
+                weather: Optional[str] = None, market_trends: Optional[Sequence[Optional[Dict[str, float]]]] = None,
+                rng: Optional[GameRNG] = None, grow_crops: bool = True):
+    # weather and market_trends (one dict or None per player) replace the
+    # random draws when a recorded day is replayed; with `rng` they are read
+    # from the game's pre-generated sequences instead of drawn one at a time.
+    # Without `grow_crops` the plots are left alone, for callers that
+    # integrate crop growth over several days at once (see crop_scheduler)
+    
+    # The previous day's sell orders clear before the new day starts
+    clear_market(shared_market)
+    
+    day = players[0].day + 1
+    if rng is not None:
+        if weather is None:
+            weather = rng.weather_for_day(day)
+        if market_trends is None:
+            market_trends = rng.market_trends_for_day(day)
+    
+    # Season and weather are shared, so they are worked out once for everyone
+    rules = shared_market.rules
+    season = get_season(day, rules)
+    if weather is None:
+        weather = get_weather(season, rules)
+    if market_trends is None:
+        market_trends = [None] * len(players)
+    
+    # One pass per player: new day, energy, trends, upgrade effects and crop growth
+    for state, player_trends in zip(players, market_trends):
+        state.day = day
+        state.season = season
+        state.weather = weather
+        state.energy = min(state.energy + rules.energy_regen_per_day, rules.max_energy)
+        update_market_trends(state, player_trends)
+        process_player_state(state, grow_crops)
 
-def process_player_state(state: GameState):
-    # Apply upgrade effects
-    water_saving = 0
-    weather_protection = 0
-    yield_boost = 0
-    energy_saving = 0
-    
-    for upgrade in state.upgrades:
-        if upgrade in GAME_RULES["upgrades"]:
-            upgrade_info = GAME_RULES["upgrades"][upgrade]
-        elif upgrade in GAME_RULES["cooperative_upgrades"]:
-            upgrade_info = GAME_RULES["cooperative_upgrades"][upgrade]
-        else:
-            continue
+def process_player_state(state: PlayerState, grow_crops: bool = True):
+    # Upgrade effects are cached on the state and only rebuilt when upgrades change
+    modifiers = get_upgrade_modifiers(state)
+    if grow_crops:
+        grow_player_crops(state, modifiers)
 
-        if "water_saving" in upgrade_info:
-            water_saving += upgrade_info["water_saving"]
-        if "weather_protection" in upgrade_info:
-            weather_protection += upgrade_info["weather_protection"]
-        if "yield_boost" in upgrade_info:
-            yield_boost += upgrade_info["yield_boost"]
-        if "energy_saving" in upgrade_info:
-            energy_saving += upgrade_info["energy_saving"]
-    
+    # Apply energy saving
+    if modifiers.energy_saving > 0:
+        state.energy = min(state.energy * (1 + modifiers.energy_saving), state.rules.max_energy)
+
+def grow_player_crops(state: PlayerState, modifiers):
+    rules = state.rules
     # Process crop growth
-    for plot in state.plots:
-        if plot.crop:
-            growth_rate = GAME_RULES["weather_effects"][state.weather]["growth"]
-            # Apply weather protection
-            if weather_protection > 0:
-                growth_rate = max(growth_rate, 1.0)  # Ensure growth rate is at least 1.0 (neutral)
-            
-            # Apply water saving (assuming it affects growth rate)
-            growth_rate *= (1 + water_saving)
-            
-            new_growth = plot.crop.growth_progress + growth_rate / GAME_RULES["crops"][plot.crop.type]["base_growth_time"]
-            plot.crop.growth_progress = min(1.0, new_growth)  # Cap growth at 100%
+    growth_rate = rules.weather_growth[rules.weather_index[state.weather]]
+    # Apply weather protection
+    if modifiers.weather_protection > 0:
+        growth_rate = max(growth_rate, 1.0)  # Ensure growth rate is at least 1.0 (neutral)
+    
+    # Apply water saving (assuming it affects growth rate)
+    growth_rate *= (1 + modifiers.water_saving)
+    quality_factor = 1 + modifiers.yield_boost
+    depletion_rate = rules.soil_depletion_rate
+    crop_index = rules.crop_index
+    crop_growth_time = rules.crop_growth_time
+
+    for plot in state.writable_plots():
+        crop = plot.crop
+        if crop:
+            new_growth = crop.growth_progress + growth_rate / crop_growth_time[crop_index[crop.type]]
+            crop.growth_progress = min(1.0, new_growth)  # Cap growth at 100%
             
             # Apply yield boost to crop quality
-            plot.crop.quality *= (1 + yield_boost)
+            crop.quality *= quality_factor
 
             # Apply daily soil depletion
-            plot.soil_quality = max(0, plot.soil_quality - GAME_RULES["soil_quality"]["depletion_rate"])
+            plot.soil_quality = max(0, plot.soil_quality - depletion_rate)
 
-    # Apply energy saving
-    if energy_saving > 0:
-        state.energy = min(state.energy * (1 + energy_saving), GAME_RULES["max_energy"])
-
-def process_action(state: GameState, shared_market: SharedMarket, action: dict) -> str:
+def process_action(state: PlayerState, shared_market: MarketState, action: dict) -> str:
+    rules = state.rules
     action_type = action['name']
     parameters = action['parameters']
     initial_energy = state.energy
@@ -263,13 +324,13 @@ def process_action(state: GameState, shared_market: SharedMarket, action: dict)
     elif action_type == "Harvest":
         result = harvest_crop(state, Action(type="harvest", details={"plot_index": int(parameters[0])}))
     elif action_type == "Buy":
-        if parameters[0] in GAME_RULES["cooperative_upgrades"]:
+        if parameters[0] in rules.cooperative_upgrades:
             return "Cooperative upgrades can only be purchased through a separate action"
         result = buy_item(state, Action(type="buy", details={"item_type": parameters[0]}))
     elif action_type == "Sell":
         result = sell_crops(state, shared_market, Action(type="sell", details={"crop_type": parameters[0], "amount": int(parameters[1]), "market_type": "local"}))
     elif action_type == "Rest":
-        state.energy = min(state.energy + GAME_RULES["energy_regen_per_day"], GAME_RULES["max_energy"])
+        state.energy = min(state.energy + rules.energy_regen_per_day, rules.max_energy)
         result = "Rested and regained some energy"
     elif action_type == "Maintenance":
         result = perform_maintenance(state, Action(type="maintenance", details={"maintenance_type": parameters[0], "plot_index": int(parameters[1])}))
@@ -282,21 +343,22 @@ def process_action(state: GameState, shared_market: SharedMarket, action: dict)
     energy_used = initial_energy - state.energy
     return f"{result} (Energy: {initial_energy} -> {state.energy}, Used: {energy_used})"
     
-def process_cooperative_upgrade(player1_state: GameState, player2_state: GameState, shared_market: SharedMarket, action: dict) -> str:
-    upgrade_type = action['parameters'][0]
-    if upgrade_type not in GAME_RULES["cooperative_upgrades"]:
-        return "Invalid cooperative upgrade"
-    
-    upgrade_cost = GAME_RULES["cooperative_upgrades"][upgrade_type]["cost"]
-    if player1_state.money < upgrade_cost / 2 or player2_state.money < upgrade_cost / 2:
-        return "Insufficient funds for cooperative upgrade"
-    
-    player1_state.money -= upgrade_cost / 2
-    player2_state.money -= upgrade_cost / 2
-    player1_state.upgrades.append(upgrade_type)
-    player2_state.upgrades.append(upgrade_type)
-    
-    return f"Purchased cooperative upgrade: {upgrade_type}"
+def apply_player_action(state: PlayerState, players: Sequence[PlayerState], shared_market: MarketState,
+                        action: dict) -> str:
+    if action['name'] == "BuyCooperative":
+        return process_cooperative_upgrade(players, shared_market, action)
+    return process_action(state, shared_market, action)
+
+def format_game_log_entry(day: int, player: str, action: dict, result: str) -> str:
+    return f"Day {day}, {player}: {action['name']}({', '.join(map(str, action.get('parameters', [])))}): {result}"
+
+def joined_cooperative_result(upgrade_type: str) -> str:
+    return f"Joined cooperative upgrade purchased this day: {upgrade_type}"
+
+def process_cooperative_upgrade(players: Sequence[PlayerState], shared_market: MarketState, action: dict) -> str:
+    return buy_cooperative_upgrade(players, Action(type="buy_cooperative", details={"upgrade_type": action['parameters'][0]}))
 
-def update_game_state(state: GameState):
-    process_day(state)
\ No newline at end of file
+def calculate_final_score(state: PlayerState) -> float:
+    crop_value = sum(state.harvested_crops.values())
+    state.money += crop_value  # Add crop value to player's money
+    return state.money
@@ -0,0 +1,43 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from rules import RULES, SEASON_LENGTH, CompiledRules
+
+class GameRNG:
+    """All of one game's weather and market-trend draws, generated up front from a seed.
+
+    The draws use their own numpy Generator rather than the global `random`
+    module, so the same seed gives the same game in any process, whatever else
+    ran before it. process_day only indexes into the pre-generated sequences.
+    """
+
+    def __init__(self, seed: Optional[int] = None, n_players: int = 2, total_days: Optional[int] = None,
+                 rules: CompiledRules = RULES):
+        if total_days is None:
+            total_days = rules.total_days
+        generator = np.random.default_rng(seed)
+        self.seed = seed
+        days = np.arange(total_days + 1)
+
+        # Inverse-CDF sampling of every day's weather at once from its season's table
+        season_ids = (np.maximum(days, 1) - 1) // SEASON_LENGTH % len(rules.seasons)
+        cumulative = np.cumsum(rules.arrays.weather_probabilities, axis=1)
+        draws = generator.random(total_days + 1)
+        weather_ids = (draws[:, None] >= cumulative[season_ids]).sum(axis=1)
+        self.weather_ids = np.minimum(weather_ids, len(rules.weather_types) - 1)
+        self.weather: Tuple[str, ...] = tuple(rules.weather_types[i] for i in self.weather_ids)
+
+        # One trend vector per player for every day the trends refresh
+        refresh_days = days[days % rules.trend_duration == 1]
+        trends = generator.uniform(0.8, 1.2, size=(len(refresh_days), n_players, len(rules.crop_types)))
+        self._market_trends: Dict[int, List[Dict[str, float]]] = {
+            int(day): [dict(zip(rules.crop_types, row.tolist())) for row in players]
+            for day, players in zip(refresh_days, trends)
+        }
+
+    def weather_for_day(self, day: int) -> str:
+        return self.weather[day]
+
+    def market_trends_for_day(self, day: int) -> Optional[List[Dict[str, float]]]:
+        """Fresh trends per player on refresh days, None on every other day."""
+        trends = self._market_trends.get(day)
+        return None if trends is None else [dict(player_trends) for player_trends in trends]
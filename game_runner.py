@@ -1,11 +1,21 @@
 import asyncio
 import os
-import time
+import random
+from typing import Mapping, Optional, Sequence
 from autogen import AssistantAgent, UserProxyAgent
 from dotenv import load_dotenv
-from entities import GameState, Plot, SharedMarket
-from game_logic import process_action, process_cooperative_upgrade, process_day, update_game_state
-from constants import GAME_RULES
+from entities import MarketState, PlayerState, PlotState
+from game_logic import (apply_player_action, calculate_final_score, format_game_log_entry, joined_cooperative_result,
+                        clear_market, process_day)
+from rules import RULES, CompiledRules
+from llm_cache import GameRecording, ResponseCache, make_cache_key
+from ring_log import DEFAULT_LOG_WINDOW, RingLog
+from journal import GameJournal, ResumedGame
+from game_rng import GameRNG
+from prompts import PromptBuilder, estimate_tokens
+from llm_pool import LLMPool
+from metrics import GameTrace, record_action, record_llm_call, span
+from search_bot import SearchBot
 
 # Load environment variables
 load_dotenv()
@@ -24,151 +34,238 @@ openai_agent2_config = {
     "api_key": openai_api_key,
 }
 
-# Convert GameState objects to dictionaries
+# Convert PlayerState objects to dictionaries
 def game_state_to_dict(state):
     return {
         "money": state.money,
         "harvested_crops": state.harvested_crops,
         "energy": state.energy,
         "invalid_action_count": state.invalid_action_count,
-        "action_log": state.action_log,
+        "action_log": list(state.action_log),
     }
 
-async def run_game(player1_config: dict, player2_config: dict, stop_event: asyncio.Event):
-    shared_market = SharedMarket()
-    
-    # Create AutoGen agents for players
-    player1_agent = AssistantAgent(name="Player1", llm_config={"config_list": [openai_agent1_config]}, **player1_config)
-    player2_agent = AssistantAgent(name="Player2", llm_config={"config_list": [openai_agent2_config]}, **player2_config)
+async def request_response(proxy: UserProxyAgent, agent: AssistantAgent, message: str, cache_key: str = "",
+                           cache: Optional[ResponseCache] = None, recording: Optional[GameRecording] = None,
+                           player: str = "", day: int = 0, pool: Optional[LLMPool] = None, model: str = "",
+                           trace: Optional[GameTrace] = None) -> str:
+    if recording is not None and recording.replaying:
+        response = recording.replay(player, day, cache_key)
+    else:
+        response = cache.get(cache_key) if cache is not None else None
+        if response is None:
+            with span("llm", trace, player=player, day=day):
+                if pool is not None:
+                    chat_result = await pool.call(model, lambda: proxy.a_initiate_chat(agent, message=message, max_turns=1))
+                else:
+                    chat_result = await proxy.a_initiate_chat(agent, message=message, max_turns=1)
+            response = chat_result.summary
+            record_llm_call(model, estimate_tokens(message), estimate_tokens(response))
+            if cache is not None:
+                cache.put(cache_key, response)
+        if recording is not None:
+            recording.record(player, day, cache_key, response)
+    return response
+
+async def run_game(player_configs: Sequence[dict], stop_event: asyncio.Event, concurrent_decisions: bool = False,
+                   cache: Optional[ResponseCache] = None, recording: Optional[GameRecording] = None, seed: Optional[int] = None,
+                   log_window: int = DEFAULT_LOG_WINDOW, log_dir: Optional[str] = None,
+                   journal: Optional[GameJournal] = None, resume: Optional[ResumedGame] = None, plan_days: int = 1,
+                   prompts: Optional[PromptBuilder] = None, llm_configs: Optional[Sequence[Optional[dict]]] = None,
+                   llm_pool: Optional[LLMPool] = None, day_delay: float = 0.2, trace: Optional[GameTrace] = None,
+                   bots: Optional[Mapping[int, SearchBot]] = None, rules: Optional[CompiledRules] = None):
+    """Play a game between AutoGen agents, one per entry of `player_configs`, yielding the state after each day.
+
+    All players share one market. Each day they act in order, Player 1 first;
+    updates carry per-player lists (`players`, `actions`, `player_states`,
+    `action_logs`, and `scores` at the end) in the same order.
+
+    With `concurrent_decisions`, every agent is asked for its action at the
+    same time from the start-of-day state, so a day waits for one LLM round
+    trip instead of one per player. The actions are still applied in player
+    order, so Sell asks join the shared order book in the same order as in
+    sequential mode; the book is cleared in price-time priority by the
+    end-of-day auction and the proceeds arrive the next day. If several
+    players pick the same BuyCooperative upgrade that day it is bought once
+    and shared; different upgrades are each attempted in player order.
+
+    `cache` answers byte-identical prompts for the same model config from
+    disk. `recording` either records every response together with the game
+    seed, or replays a recorded game with no agents and no network.
+
+    The game log and every action log keep only their newest `log_window`
+    entries in memory (at least the prompt's display count); with `log_dir`
+    older entries are appended to JSONL files there instead of dropped.
+
+    `journal` records weather, market trends and every applied action, with
+    periodic snapshots. Passing a `resume` loaded from that journal continues
+    the game after its last complete day without asking the agents again.
+
+    With `plan_days` > 1 each agent is asked for a schedule of up to that many
+    actions, one per day, and only asked again once the schedule runs out or
+    one of its actions is penalised as invalid. Each planned action is applied
+    on its own day exactly like a single decision.
+
+    `prompts` builds the decision prompts; the default reproduces the
+    original full-state prompt, PromptBuilder(compact=True) a short one.
+
+    `llm_configs` gives each player's llm config; missing ones alternate
+    between the two OpenAI models configured above. With `llm_pool`, every
+    agent call goes through the pool's per-model concurrency and rate
+    limits. `day_delay` is the pause after each day's update.
+
+    Each day's phases (LLM calls, parsing, actions, day processing and the
+    pause) are timed into the process-wide metrics; a `trace` also keeps
+    this game's individual spans.
+
+    `bots` maps player indexes (0 for Player 1) to search bots that play
+    those seats instead of AutoGen agents. A bot decides from the live state
+    each day, in a worker thread so the event loop keeps serving requests.
+
+    `rules` replaces the standard GAME_RULES for this game only, including
+    in the default prompts; a resumed game keeps the rules it was started with.
+    """
+    if resume is not None:
+        n_players = len(resume.players)
+        rules = resume.shared_market.rules
+    else:
+        n_players = len(player_configs)
+    if rules is None:
+        rules = RULES
+    names = [f"Player {i + 1}" for i in range(n_players)]
+    if recording is not None and recording.replaying:
+        seed = recording.seed
+    elif resume is not None:
+        seed = resume.seed
+    if seed is None:
+        # Every game is seeded so recordings and journals can reproduce its weather
+        seed = random.randrange(2**32)
+    if recording is not None and not recording.replaying:
+        recording.begin(seed)
+    rng = GameRNG(seed, n_players=n_players, rules=rules)
+    shared_market = MarketState(rules=rules)
+    llm_configs = list(llm_configs or [])
+    llm_configs += [None] * (n_players - len(llm_configs))
+    default_configs = (openai_agent1_config, openai_agent2_config)
+    llm_configs = [config if config is not None else {"config_list": [default_configs[i % 2]]}
+                   for i, config in enumerate(llm_configs)]
     
-    # Create UserProxyAgents to interact with the AssistantAgents
-    player1_proxy = UserProxyAgent(name="Player1Proxy",human_input_mode="NEVER")
-    player2_proxy = UserProxyAgent(name="Player2Proxy",human_input_mode="NEVER")
+    bots = dict(bots or {})
+    if recording is not None and recording.replaying:
+        agents = proxies = [None] * n_players
+    else:
+        # Create AutoGen agents for players, and UserProxyAgents to interact with them
+        agents = [AssistantAgent(name=f"Player{i + 1}", llm_config=llm_configs[i], **player_configs[i])
+                  if i not in bots else None for i in range(n_players)]
+        proxies = [UserProxyAgent(name=f"Player{i + 1}Proxy", human_input_mode="NEVER") if i not in bots else None
+                   for i in range(n_players)]
     
-    player1_state = GameState(money=GAME_RULES["starting_money"], energy=GAME_RULES["max_energy"], plots=[Plot()])
-    player2_state = GameState(money=GAME_RULES["starting_money"], energy=GAME_RULES["max_energy"], plots=[Plot()])
+    log_window = max(log_window, rules.action_log_display_count)
+    def new_log(name):
+        spill_path = os.path.join(log_dir, f"{name}.jsonl") if log_dir else None
+        return RingLog(window=log_window, spill_path=spill_path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
 
-    # Prepare game rules and instructions
-    game_instructions = f"""
-    You are playing a farming game. Here are the rules:
-    {GAME_RULES}
-    
-    Available actions:
-    1. Plant(crop_name, plot_number)
-    2. Harvest(plot_number)
-    3. Buy(item_name, quantity)
-    4. Sell(crop_name, quantity, market_type)
-    5. Rest()
-    6. Maintenance(type_of_maintenance, plot_number)
-    7. BuyCooperative(upgrade_name)
-
-    Make decisions to maximize your score. Your score is calculated as:
-    Total money + Value of harvested crops
-
-    Important rules to remember:
-    - You can only harvest crops that have 100% grown. The growth time for each crop is specified in the rules above.
-    - Consider the best course of action, thinking through your decision step by step.
-    - You can only plant on plots that do not have a crop. If a plot already has a crop, you need to harvest it first before planting a new one.
-    - Each plot is numbered, starting from 1. Make sure you're using the correct plot number in your actions.
-    - Before harvesting or planting, check the state of your plots to ensure the action is valid.
-
-    Examples:
-    - Plant(Corn, 2) # To Plant Corn on plot 2 (only if plot 2 is vacant)
-    - Harvest(1) # To Harvest from plot 1 (only if the crop on plot 1 is 100% grown)
-    - Sell(Wheat, 10, local) # To Sell 10 Wheat in the local market
-    - Rest() # Rest
-    - Buy(Irrigation)  # To buy an individual upgrade
-    - Buy(Plot)  # To buy a plot
-    - Maintenance(water, 3) # To perform maintenance (water) on plot 3
-    - BuyCooperative(CommunityCenter)  # To buy a cooperative upgrade
-
-    Notes:
-    - You start with one plot (numbered 1).
-    - Plot numbers in commands start from 1.
-    - For buying plots or upgrades, you can use Buy(item_name) or Buy(item_name, 1). The quantity is ignored for these purchases.
-    - To buy cooperative upgrades, use the BuyCooperative action with the upgrade name.
-    - The Rest action doesn't require parameters.
-    - For actions with only one parameter, still use the format ActionName(parameter).
-    - Maintenance improves soil quality of the specified plot.
-    - Cooperative upgrades benefit both players and require coordination.
-    - Always check your current game state before making a decision to ensure your action is valid.
-
-    Your game state will be provided in this format:
-    Day: [current day]
-    Season: [current season]
-    Weather: [current weather]
-    Money: [your current money]
-    Energy: [your current energy]
-    Plots:
-    [list of plot statuses]
-    Harvested Crops: [your harvested crops]
-    Upgrades: [your upgrades]
-    Invalid Actions: [number of invalid actions]
-    Action Log:
-    [list of your recent actions and their results]
-
-    Plot status will show if a plot is vacant or what crop is growing, including its growth percentage.
-    The Action Log provides a history of your recent actions and their outcomes, which can help inform your decision-making.
-    """
-    game_log = []
-    player1_action = ""
-    player2_action = ""
+    if resume is not None:
+        player_states = resume.players
+        shared_market = resume.shared_market
+        for i, state in enumerate(player_states):
+            resumed_log = state.action_log
+            state.action_log = new_log(f"player{i + 1}_actions")
+            state.action_log.restore(resumed_log.first_index, resumed_log)
+        start_day = resume.day + 1
+    else:
+        player_states = [
+            PlayerState(money=rules.starting_money, energy=rules.max_energy, plots=[PlotState()],
+                        action_log=new_log(f"player{i + 1}_actions"), rules=rules)
+            for i in range(n_players)
+        ]
+        start_day = 1
+    if journal is not None:
+        if resume is not None:
+            journal.resume(resume)
+        else:
+            journal.begin(seed, n_players, rules)
+
+    # Game rules and instructions are rendered once per game
+    if prompts is None:
+        prompts = PromptBuilder(game_rules=rules.raw)
+
+    game_log = new_log("game_log")
+    if resume is not None:
+        game_log.restore(resume.game_log.first_index, resume.game_log)
+    actions = [""] * n_players
+
+    plans = {player: [] for player in names}
+    seat_bots = {names[i]: (i, bot) for i, bot in bots.items()}
 
-    for day in range(1, GAME_RULES["total_days"] + 1):
+    async def decide(player, agent, proxy, state, llm_config, player_config):
+        if player in seat_bots:
+            index, bot = seat_bots[player]
+            with span("search", trace, player=player, day=day):
+                return await asyncio.to_thread(bot.choose, index, player_states, shared_market)
+        plan = plans[player]
+        if not plan:
+            days = min(plan_days, rules.total_days - day + 1)
+            message = prompts.build(player, day, state, days)
+            cache_key = make_cache_key(llm_config, player_config.get("system_message", ""), message)
+            model = llm_config["config_list"][0].get("model", "")
+            response = await request_response(proxy, agent, message, cache_key, cache, recording, player, day,
+                                              llm_pool, model, trace)
+            with span("parse", trace, player=player, day=day):
+                plan.extend(parse_action_plan(response, days))
+        return plan.pop(0)
+
+    seats = list(zip(names, agents, proxies, player_states, llm_configs, player_configs))
+    day = start_day
+    for day in range(start_day, rules.total_days + 1):
         # Check if the game should be stopped
         if stop_event.is_set():
             print("Game stopped")
             return
         # Process end of previous day and start of new day
         if day > 1:
-            process_day(player1_state, player2_state, shared_market)
+            with span("process_day", trace, day=day):
+                process_day(player_states, shared_market, rng=rng)
+            if journal is not None:
+                journal.record_day(day, player_states)
 
         day_log = []
-        # Process actions for both players
-        for player, agent, proxy, state in [
-            ("Player 1", player1_agent, player1_proxy, player1_state),
-            ("Player 2", player2_agent, player2_proxy, player2_state)
-        ]:
-            # Prepare game state information
-            game_info = {
-                "Day": day,
-                "Season": state.season,
-                "Weather": state.weather,
-                "Money": state.money,
-                "Energy": state.energy,
-                "Plots": chr(10).join(state.get_plot_status(GAME_RULES)),
-                "Harvested Crops": state.harvested_crops,
-                "Upgrades": state.upgrades,
-                "Invalid Actions": state.invalid_action_count,
-                "Action Log": chr(10).join(state.action_log[-GAME_RULES["action_log_display_count"]:])  # Show last action_log_display_count actions
-            }
-            
-            # Ask agent for decision
-            message = f"""
-            {game_instructions}
-            
-            Current game state:
-            {game_info}
-            
-            Make a decision for {player} based on this game state. 
-            Respond with a single action in the format: ActionName(parameter1, parameter2)
-            For actions with fewer than two parameters, use ActionName(parameter) or ActionName()
-            """
-            
-            chat_result = await proxy.a_initiate_chat(agent, message=message, max_turns=1)
-            action = parse_action(chat_result)
-            if player == "Player 1":
-                player1_action = {"name": action['name'], "parameters": action.get('parameters', [])}
-            else:
-                player2_action = {"name": action['name'], "parameters": action.get('parameters', [])}
+        if concurrent_decisions:
+            # Every player decides from the same start-of-day state
+            decisions = await asyncio.gather(*(decide(*seat) for seat in seats))
+        cooperative_purchase = None
 
+        # Process actions in player order, always Player 1 first
+        for i, seat in enumerate(seats):
+            player, state = seat[0], seat[3]
+            if concurrent_decisions:
+                action = decisions[i]
+            else:
+                action = await decide(*seat)
+            actions[i] = {"name": action['name'], "parameters": action.get('parameters', [])}
             
             # Process the action
-            if action['name'] == "BuyCooperative":
-                result = process_cooperative_upgrade(player1_state, player2_state, shared_market, action)
+            joined = (concurrent_decisions and action['name'] == "BuyCooperative"
+                      and action['parameters'][0] == cooperative_purchase)
+            if joined:
+                # Several players asked for the same upgrade without seeing each
+                # other's choice: buy it once rather than charging again
+                result = joined_cooperative_result(cooperative_purchase)
             else:
-                result = process_action(state, shared_market, action)
-            day_log.append(f"Day {day}, {player}: {action['name']}({', '.join(map(str, action.get('parameters', [])))}): {result}")
+                upgrades_before = len(state.upgrades)
+                invalid_before = state.invalid_action_count
+                with span("action", trace, player=player, day=day):
+                    result = apply_player_action(state, player_states, shared_market, action)
+                if action['name'] == "BuyCooperative" and len(state.upgrades) > upgrades_before:
+                    cooperative_purchase = action['parameters'][0]
+                record_action(state.invalid_action_count > invalid_before)
+                if state.invalid_action_count > invalid_before:
+                    # The plan no longer fits the game; ask for a new one tomorrow
+                    plans[player].clear()
+            if journal is not None:
+                journal.record_action(day, player, action, joined)
+            day_log.append(format_game_log_entry(day, player, action, result))
 
             # Check if the game should stop after each player's action
             if stop_event.is_set():
@@ -176,20 +273,18 @@ async def run_game(player1_config: dict, player2_config: dict, stop_event: async
                 return
         
         game_log.extend(day_log)
+        if journal is not None:
+            journal.end_day(day, player_states, shared_market, game_log)
         
         # Yield the current game state after each day
         yield {
             "day": day,
-            "player1": player1_state,
-            "player2": player2_state,
+            "players": player_states,
             "shared_market": shared_market,
             "game_log": game_log,
-            "player1_action": player1_action,
-            "player2_action": player2_action,
-            "player1_state": game_state_to_dict(player1_state),
-            "player2_state": game_state_to_dict(player2_state),
-            "player1_action_log": player1_state.action_log,
-            "player2_action_log": player2_state.action_log,
+            "actions": list(actions),
+            "player_states": [game_state_to_dict(state) for state in player_states],
+            "action_logs": [list(state.action_log) for state in player_states],
         }
 
         # Check if the game should stop after yielding the state
@@ -197,39 +292,32 @@ async def run_game(player1_config: dict, player2_config: dict, stop_event: async
             print("Game stopped after yielding state")
             return
         
-        await asyncio.sleep(0.2)  # Small delay to prevent blocking
-
-    # Game over, determine winner
-    def calculate_final_score(player_state):
-        crop_value = sum(player_state.harvested_crops.values())
-        player_state.money += crop_value  # Add crop value to player's money
-        return player_state.money
+        with span("sleep", trace, day=day):
+            await asyncio.sleep(day_delay)  # Small delay to prevent blocking
 
-    player1_score = calculate_final_score(player1_state)
-    player2_score = calculate_final_score(player2_state)
-    
-    if player1_score > player2_score:
-        winner = "Player 1"
-    elif player2_score > player1_score:
-        winner = "Player 2"
-    else:
-        winner = "Tie"
+    # Game over: the last day's sell orders clear, then determine winner
+    clear_market(shared_market)
+    scores = [calculate_final_score(state) for state in player_states]
     
+    best = max(scores)
+    leaders = [name for name, score in zip(names, scores) if score == best]
+    winner = leaders[0] if len(leaders) == 1 else "Tie"
 
     # Yield final game result
     yield {
         "day": day,
         "game_over": True,
         "winner": winner,
-        "player1_score": player1_score,
-        "player2_score": player2_score,
-        "player1_state": game_state_to_dict(player1_state),
-        "player2_state": game_state_to_dict(player2_state)
+        "scores": scores,
+        "player_states": [game_state_to_dict(state) for state in player_states],
     }
 
 
 def parse_action(chat_result):
-    action_str = chat_result.summary.strip()
+    return parse_action_text(chat_result.summary)
+
+def parse_action_text(action_str: str) -> dict:
+    action_str = action_str.strip()
     
     # Split the action string into action name and parameters
     action_parts = action_str.split('(')
@@ -247,3 +335,19 @@ def parse_action(chat_result):
     
     return action
 
+def parse_action_plan(plan_str: str, max_actions: int) -> list:
+    """Parse up to `max_actions` actions, one per line; a single action parses as before."""
+    if max_actions == 1:
+        return [parse_action_text(plan_str)]
+    actions = []
+    for line in plan_str.splitlines():
+        line = line.strip().strip("`").strip()
+        # Tolerate list markers such as "1." or "-" in front of the action
+        line = line.lstrip("-*0123456789.) ").strip()
+        if "(" not in line:
+            continue
+        actions.append(parse_action_text(line))
+        if len(actions) == max_actions:
+            break
+    return actions or [parse_action_text(plan_str)]
+
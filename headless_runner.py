@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from entities import MarketState, PlayerState, PlotState
+from game_logic import apply_player_action, calculate_final_score, clear_market, process_day
+from game_rng import GameRNG
+from rules import RULES, CompiledRules
+from crop_scheduler import MATURITY, CropSchedule, fast_forward
+from policies import EVENT_DRIVEN_POLICIES, POLICIES, Policy
+
+def is_idle(players: Sequence[PlayerState], shared_market: MarketState, actions: Sequence[dict]) -> bool:
+    """Whether tomorrow looks the same as today to event-driven policies until a crop matures.
+
+    Everyone rested with full energy and has nothing on the market, so money,
+    energy and crops stay as they are.
+    """
+    return (all(action["name"] == "Rest" for action in actions)
+            and all(state.energy == state.rules.max_energy for state in players)
+            and not any(book.asks for book in shared_market.books.values()))
+
+def play_game(player1_policy: Policy, player2_policy: Policy, seed: Optional[int] = None,
+              fast_forward_idle: bool = True, recorder=None, rules: CompiledRules = RULES) -> Tuple[float, float]:
+    """Play one full game between two scripted policies and return both final scores.
+
+    Follows the same day loop as game_runner.run_game, without agents or delays.
+    When both policies are event-driven, runs of days on which both would
+    only rest are skipped in one step up to the next crop maturity; the
+    result is identical to playing them day by day.
+
+    A `recorder` (trajectory_store.GameRecorder) gets every day's states
+    once both players have acted; it needs every day, so it turns off
+    fast-forwarding.
+
+    `rules` replaces the standard GAME_RULES for this game only.
+    """
+    if seed is not None:
+        # Weather and trends come from the game's own generator; this seeds random_policy
+        random.seed(seed)
+    rng = GameRNG(seed, rules=rules)
+    shared_market = MarketState(rules=rules)
+    players = [PlayerState(money=rules.starting_money, energy=rules.max_energy, plots=[PlotState()], rules=rules)
+               for _ in range(2)]
+
+    policies = (player1_policy, player2_policy)
+    fast_forward_idle = (fast_forward_idle and recorder is None
+                         and all(policy in EVENT_DRIVEN_POLICIES for policy in policies))
+    total_days = rules.total_days
+
+    day = 1
+    while day <= total_days:
+        if day > 1:
+            process_day(players, shared_market, rng=rng)
+        actions = []
+        for policy, state in zip(policies, players):
+            action = policy(state)
+            apply_player_action(state, players, shared_market, action)
+            actions.append(action)
+        if recorder is not None:
+            recorder.record_day(day, players, actions)
+        if fast_forward_idle and day < total_days and is_idle(players, shared_market, actions):
+            schedule = CropSchedule(players, rng, day + 1, total_days - day)
+            maturity = schedule.next_event_day([MATURITY])
+            skip = (maturity if maturity is not None else total_days + 1) - day - 1
+            if skip:
+                fast_forward(players, shared_market, rng, skip, schedule=schedule)
+                day += skip
+        day += 1
+
+    clear_market(shared_market)
+    player1_score, player2_score = (calculate_final_score(state) for state in players)
+    return player1_score, player2_score
+
+def _play_chunk(player1_policy: Policy, player2_policy: Policy, seeds: Sequence[int]) -> List[Tuple[float, float]]:
+    return [play_game(player1_policy, player2_policy, seed) for seed in seeds]
+
+def summarize_scores(scores: np.ndarray) -> dict:
+    return {
+        "mean": float(scores.mean()),
+        "std": float(scores.std()),
+        "min": float(scores.min()),
+        "max": float(scores.max()),
+        "percentiles": {str(p): float(v) for p, v in zip((5, 25, 50, 75, 95), np.percentile(scores, (5, 25, 50, 75, 95)))},
+    }
+
+def run_monte_carlo(player1_policy: Policy, player2_policy: Policy, num_games: int = 1000, seed: int = 0,
+                    workers: Optional[int] = None, chunk_size: Optional[int] = None) -> dict:
+    """Run `num_games` headless games across a process pool and aggregate the scores.
+
+    Game i is seeded with `seed + i`, so results do not depend on how games
+    are split into chunks or workers. Policies must be picklable (module-level
+    functions or functools.partial objects).
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # A few chunks per worker balances load without paying pickling overhead per game
+        chunk_size = max(1, num_games // (workers * 4))
+    seeds = list(range(seed, seed + num_games))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, num_games, chunk_size)]
+
+    results = []
+    if workers == 1:
+        for chunk in chunks:
+            results.extend(_play_chunk(player1_policy, player2_policy, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_play_chunk, player1_policy, player2_policy, chunk) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+
+    scores = np.array(results, dtype=float).reshape(-1, 2)
+    return {
+        "games": num_games,
+        "player1": summarize_scores(scores[:, 0]),
+        "player2": summarize_scores(scores[:, 1]),
+        "player1_win_rate": float(np.mean(scores[:, 0] > scores[:, 1])),
+        "player2_win_rate": float(np.mean(scores[:, 1] > scores[:, 0])),
+        "tie_rate": float(np.mean(scores[:, 0] == scores[:, 1])),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless games between scripted policies")
+    parser.add_argument("--player1", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--player2", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    summary = run_monte_carlo(POLICIES[args.player1], POLICIES[args.player2], args.games, args.seed, args.workers, args.chunk_size)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
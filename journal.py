@@ -0,0 +1,156 @@
+import json
+from typing import List, Optional, Sequence
+from entities import MarketState, PlayerState, PlotState
+from game_logic import apply_player_action, format_game_log_entry, joined_cooperative_result, process_day
+from ring_log import RingLog
+from rules import RULES, CompiledRules
+
+# Journal records, one JSON object per line:
+#   {"type": "start", "seed": ..., "players": N, "snapshot_every": K}
+#                                               plus "rules": {...} for games not on GAME_RULES
+#   {"type": "day", "day": d, "weather": w, "market_trends": [one per player] or null}
+#   {"type": "action", "day": d, "player": "Player 1", "action": {...}, "joined": false}
+#   {"type": "end", "day": d}                   after every player acted on day d
+#   {"type": "snapshot", "day": d, ...}         full state at the end of day d, every K days, with the
+#                                               total length of every log so spill files can be cut back
+
+class GameJournal:
+    """Append-only record of everything needed to rebuild a game without its agents.
+
+    Every record is flushed as it is written, so a crash loses at most the
+    day in progress; the loader ignores days without an "end" record.
+    """
+
+    def __init__(self, path: str, snapshot_every: int = 10):
+        self.path = path
+        self.snapshot_every = snapshot_every
+
+    def _write(self, record: dict):
+        # A handful of records per day: opening per write keeps nothing to clean
+        # up when a game is abandoned mid-way
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def begin(self, seed: Optional[int] = None, n_players: int = 2, rules: CompiledRules = RULES):
+        """Start a new journal, replacing any file at `path`."""
+        open(self.path, "w").close()
+        record = {"type": "start", "seed": seed, "players": n_players, "snapshot_every": self.snapshot_every}
+        if rules is not RULES:
+            record["rules"] = rules.raw
+        self._write(record)
+
+    def resume(self, resumed: "ResumedGame"):
+        """Continue a journal after the last complete day that `resumed` was loaded from."""
+        with open(self.path, "r+") as f:
+            # Drop records of the day that was in progress when the game stopped
+            f.truncate(resumed.journal_offset)
+
+    def record_day(self, day: int, players: Sequence[PlayerState]):
+        refreshed = day % players[0].rules.trend_duration == 1
+        self._write({
+            "type": "day", "day": day, "weather": players[0].weather,
+            "market_trends": [dict(state.market_trends) for state in players] if refreshed else None,
+        })
+
+    def record_action(self, day: int, player: str, action: dict, joined: bool = False):
+        self._write({"type": "action", "day": day, "player": player, "action": action, "joined": joined})
+
+    def end_day(self, day: int, players: Sequence[PlayerState], shared_market: MarketState, game_log: RingLog):
+        self._write({"type": "end", "day": day})
+        if day % self.snapshot_every == 0:
+            self._write({
+                "type": "snapshot", "day": day,
+                "players": [state.to_dict() for state in players],
+                "shared_market": shared_market.to_dict(players),
+                "game_log": list(game_log),
+                "game_log_total": len(game_log),
+                "action_log_totals": [len(state.action_log) for state in players],
+            })
+
+class ResumedGame:
+    """Game state rebuilt from a journal at the end of `day`."""
+
+    def __init__(self, day: int, players: List[PlayerState], shared_market: MarketState, game_log: RingLog,
+                 seed: Optional[int], journal_offset: int):
+        self.day = day
+        self.players = players
+        self.shared_market = shared_market
+        self.game_log = game_log
+        self.seed = seed
+        self.journal_offset = journal_offset
+
+def _read_records(path: str):
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            offset += len(line)
+            if line.endswith(b"\n"):  # a torn last line is ignored
+                yield json.loads(line), offset
+
+def load_game(path: str, day: Optional[int] = None) -> ResumedGame:
+    """Rebuild a game at the end of `day` (default: the last complete day).
+
+    Starts from the newest snapshot at or before that day and replays only
+    the records after it: recorded weather and market trends instead of new
+    draws, recorded actions instead of agent calls.
+    """
+    records = list(_read_records(path))
+    if not records or records[0][0]["type"] != "start":
+        raise ValueError(f"{path} is not a game journal")
+    seed = records[0][0]["seed"]
+    # Journals written before N-player games have no count and two players
+    n_players = records[0][0].get("players", 2)
+    rules = CompiledRules(records[0][0]["rules"]) if "rules" in records[0][0] else RULES
+    last_complete = max((r["day"] for r, _ in records if r["type"] == "end"), default=0)
+    target = last_complete if day is None else min(day, last_complete)
+
+    start_index, start_day = 1, 0
+    for i, (record, _) in enumerate(records):
+        if record["type"] == "snapshot" and record["day"] <= target:
+            start_index, start_day = i + 1, record["day"]
+            snapshot = record
+
+    # Logs are unbounded here and keep the absolute index of their first
+    # entry, so a resumed game can line them up with its spill files
+    if start_day:
+        player_data = snapshot["players"] if "players" in snapshot else [snapshot["player1"], snapshot["player2"]]
+        # Snapshots written before log totals were recorded start every log at 0
+        totals = snapshot.get("action_log_totals") or [len(data["action_log"]) for data in player_data]
+        players = []
+        for data, total in zip(player_data, totals):
+            action_log = RingLog(window=None)
+            action_log.restore(total - len(data["action_log"]), ())
+            players.append(PlayerState.from_dict(data, action_log, rules))
+        shared_market = MarketState.from_dict(snapshot["shared_market"], players, rules)
+        game_log = RingLog(window=None)
+        game_log.restore(snapshot.get("game_log_total", len(snapshot["game_log"])) - len(snapshot["game_log"]),
+                         snapshot["game_log"])
+    else:
+        players = [PlayerState(money=rules.starting_money, energy=rules.max_energy, plots=[PlotState()],
+                               action_log=RingLog(window=None), rules=rules)
+                   for _ in range(n_players)]
+        shared_market = MarketState(rules=rules)
+        game_log = RingLog(window=None)
+    players_by_name = {f"Player {i + 1}": state for i, state in enumerate(players)}
+
+    journal_offset = records[start_index - 1][1]
+    day_log = []
+    for record, offset in records[start_index:]:
+        if record.get("day", 0) > target:
+            break
+        if record["type"] == "day":
+            process_day(players, shared_market, record["weather"], record["market_trends"])
+        elif record["type"] == "action":
+            action = record["action"]
+            state = players_by_name[record["player"]]
+            if record["joined"]:
+                result = joined_cooperative_result(action["parameters"][0])
+            else:
+                result = apply_player_action(state, players, shared_market, action)
+            day_log.append(format_game_log_entry(record["day"], record["player"], action, result))
+        elif record["type"] == "end":
+            game_log.extend(day_log)
+            day_log = []
+        journal_offset = offset
+
+    return ResumedGame(target, players, shared_market, game_log, seed, journal_offset)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import List, Optional
+
+def make_cache_key(llm_config: dict, system_message: str, prompt: str) -> str:
+    """Content address for one LLM call: model config (minus secrets) plus prompt hash."""
+    config_list = [
+        {k: v for k, v in config.items() if k != "api_key"}
+        for config in llm_config.get("config_list", [])
+    ]
+    payload = json.dumps({
+        "config_list": config_list,
+        "system_message": system_message,
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk response store with an in-memory LRU in front.
+
+    Each response is a small JSON file named by its key. When the directory
+    grows past `max_bytes`, the least recently used files are evicted; a disk
+    hit refreshes the file's mtime so it counts as recently used.
+    """
+
+    def __init__(self, directory: str, memory_entries: int = 1024, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self._disk_bytes = sum(os.path.getsize(path) for path in self._files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _files(self) -> List[str]:
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def _remember(self, key: str, response: str):
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                response = json.load(f)["response"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self._remember(key, response)
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: str):
+        self._remember(key, response)
+        path = self._path(key)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "response": response}, f)
+        os.replace(tmp_path, path)  # atomic, so concurrent readers never see partial files
+        self._disk_bytes += os.path.getsize(path) - previous_size
+        if self._disk_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        files = sorted(self._files(), key=os.path.getmtime)
+        for path in files:
+            if self._disk_bytes <= self.max_bytes:
+                break
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._disk_bytes -= size
+            self._memory.pop(os.path.basename(path)[:-len(".json")], None)
+
+
+class ReplayMismatchError(RuntimeError):
+    pass
+
+
+class GameRecording:
+    """Record every decision of a game to a JSONL file, or replay one offline.
+
+    The first line holds the game seed; each following line is one decision
+    with the player, day, cache key of the prompt and the raw response. In
+    replay mode responses are looked up by (player, day), so concurrent
+    decisions may be recorded in any order, and the prompt key is checked so
+    a diverging game fails loudly instead of silently drifting.
+    """
+
+    def __init__(self, path: str, mode: str = "record", seed: Optional[int] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown recording mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.seed = seed
+        self._decisions = {}
+        if mode == "replay":
+            with open(path, "r") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            self.seed = lines[0]["seed"]
+            self._decisions = {(d["player"], d["day"]): d for d in lines[1:]}
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def begin(self, seed: int):
+        """Start a new recording for a game played with `seed`."""
+        self.seed = seed
+        with open(self.path, "w") as f:
+            f.write(json.dumps({"seed": seed}) + "\n")
+
+    def record(self, player: str, day: int, key: str, response: str):
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"player": player, "day": day, "key": key, "response": response}) + "\n")
+
+    def replay(self, player: str, day: int, key: str) -> str:
+        decision = self._decisions.get((player, day))
+        if decision is None:
+            raise ReplayMismatchError(f"Recording {self.path} has no decision for {player} on day {day}")
+        if decision["key"] != key:
+            raise ReplayMismatchError(f"Recording {self.path} diverged: prompt for {player} on day {day} differs from the recorded one")
+        return decision["response"]
@@ -0,0 +1,81 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+class RateLimiter:
+    """At most `rpm` acquisitions in any sliding 60-second window."""
+
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self._starts: deque = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= 60:
+                    self._starts.popleft()
+                if len(self._starts) < self.rpm:
+                    self._starts.append(now)
+                    return
+                await asyncio.sleep(60 - (now - self._starts[0]))
+
+class ModelLimits:
+    def __init__(self, concurrency: int = 4, rpm: Optional[int] = None):
+        self.concurrency = concurrency
+        self.rpm = rpm
+
+class LLMPool:
+    """Shared gate for every LLM call made by concurrently running games.
+
+    Each model gets its own concurrency cap and requests-per-minute window, so
+    games using different models never wait on each other. A failed call is
+    retried up to `max_retries` times with exponential backoff and full
+    jitter; the retry gives up its slot while it sleeps so other calls can
+    use it.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, ModelLimits]] = None, default_limits: Optional[ModelLimits] = None,
+                 max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or ModelLimits()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._rate_limiters: Dict[str, Optional[RateLimiter]] = {}
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _gates(self, model: str):
+        if model not in self._semaphores:
+            limits = self.limits.get(model, self.default_limits)
+            self._semaphores[model] = asyncio.Semaphore(limits.concurrency)
+            self._rate_limiters[model] = RateLimiter(limits.rpm) if limits.rpm else None
+        return self._semaphores[model], self._rate_limiters[model]
+
+    async def call(self, model: str, request: Callable[[], Awaitable[T]]) -> T:
+        """Run `request()` under `model`'s limits, retrying failures."""
+        semaphore, rate_limiter = self._gates(model)
+        attempt = 0
+        while True:
+            async with semaphore:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire()
+                self.calls += 1
+                try:
+                    return await request()
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        self.failures += 1
+                        raise
+                    print(f"LLM call to {model} failed ({e!r}), retrying")
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))))
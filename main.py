@@ -13,7 +13,11 @@ def main():
         # Add other configuration options as needed
     }
 
-    run_game(player1_config, player2_config)
+    asyncio.run(play([player1_config, player2_config]))
+
+async def play(player_configs):
+    async for _ in run_game(player_configs, asyncio.Event()):
+        pass
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import heapq
+from typing import Any, List, Optional, Tuple
+
+class OrderBook:
+    """Open orders for one crop, each side a heap in price-time priority.
+
+    Bids come out highest price first and asks lowest price first; orders at
+    the same price come out in order id (arrival) order. Adding an order and
+    taking the best one are both O(log n), so a day with thousands of orders
+    clears in O(n log n).
+
+    Heap entries are (price key, order id, owner, quantity, tag). `owner` is
+    whoever gets the fill (a PlayerState for player orders, None for the
+    market's own buyers) and `tag` is carried through untouched.
+    """
+
+    __slots__ = ("bids", "asks")
+
+    def __init__(self):
+        self.bids: List[tuple] = []
+        self.asks: List[tuple] = []
+
+    def add_bid(self, price: float, order_id: int, owner: Any, quantity: int, tag: Any = None):
+        heapq.heappush(self.bids, (-price, order_id, owner, quantity, tag))
+
+    def add_ask(self, price: float, order_id: int, owner: Any, quantity: int, tag: Any = None):
+        heapq.heappush(self.asks, (price, order_id, owner, quantity, tag))
+
+    def clone(self, owners: dict) -> "OrderBook":
+        """A copy whose orders belong to `owners[id(owner)]` instead (other owners are kept)."""
+        book = OrderBook()
+        book.bids = [(key, order_id, owners.get(id(owner), owner), quantity, tag)
+                     for key, order_id, owner, quantity, tag in self.bids]
+        book.asks = [(key, order_id, owners.get(id(owner), owner), quantity, tag)
+                     for key, order_id, owner, quantity, tag in self.asks]
+        return book
+
+    def ask_quantity(self) -> int:
+        return sum(order[3] for order in self.asks)
+
+    def match(self) -> Tuple[List[tuple], Optional[float]]:
+        """Match crossing orders as one batch.
+
+        Returns the fills as (ask owner, ask tag, bid owner, quantity) and the
+        uniform clearing price, the lowest bid that was (partly) filled, or
+        None when nothing crossed. Unfilled orders stay in the book.
+        """
+        bids, asks = self.bids, self.asks
+        fills = []
+        price = None
+        while bids and asks and -bids[0][0] >= asks[0][0]:
+            bid_key, bid_id, buyer, bid_quantity, bid_tag = bids[0]
+            ask_price, ask_id, seller, ask_quantity, ask_tag = asks[0]
+            quantity = min(bid_quantity, ask_quantity)
+            fills.append((seller, ask_tag, buyer, quantity))
+            price = -bid_key
+            # A partly filled order keeps its place, so the heap stays valid
+            if bid_quantity == quantity:
+                heapq.heappop(bids)
+            else:
+                bids[0] = (bid_key, bid_id, buyer, bid_quantity - quantity, bid_tag)
+            if ask_quantity == quantity:
+                heapq.heappop(asks)
+            else:
+                asks[0] = (ask_price, ask_id, seller, ask_quantity - quantity, ask_tag)
+        return fills, price
+
+    def clear(self) -> List[tuple]:
+        """Cancel every open order; returns the unfilled asks as (owner, tag, quantity) in priority order."""
+        unfilled = [(owner, tag, quantity) for _, _, owner, quantity, tag in sorted(self.asks)]
+        self.bids = []
+        self.asks = []
+        return unfilled
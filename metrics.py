@@ -0,0 +1,136 @@
+import os
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence
+
+# Process-wide metrics in the Prometheus text format, without a client
+# library. Recording is on unless GAME_METRICS=0; when off, span() hands back
+# a shared no-op context manager so instrumented code pays almost nothing.
+ENABLED = os.getenv("GAME_METRICS", "1") != "0"
+
+def set_enabled(enabled: bool):
+    global ENABLED
+    ENABLED = enabled
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[tuple, float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        # Per label set: [count per bucket (last one is +Inf), sum]
+        self._series: Dict[tuple, list] = {}
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_labels = _format_labels(self.label_names, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+REGISTRY: List = []
+
+PHASE_SECONDS = Histogram(
+    "game_phase_seconds", "Wall-clock seconds spent in each phase of a game day",
+    (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30), ("phase",),
+)
+LLM_TOKENS = Histogram(
+    "game_llm_tokens", "Estimated tokens per LLM call (four characters per token)",
+    (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000), ("model", "kind"),
+)
+ACTIONS = Counter("game_actions_total", "Player actions applied, by whether they were penalised as invalid", ("outcome",))
+STREAM_BYTES = Histogram(
+    "game_stream_bytes", "Bytes sent per game day on each stream",
+    (256, 1024, 4096, 16384, 65536, 262144, 1048576), ("stream",),
+)
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class GameTrace:
+    """Timing spans of one game, in the order they finished."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[dict] = []
+
+class _Span:
+    __slots__ = ("phase", "trace", "fields", "start")
+
+    def __init__(self, phase: str, trace: Optional[GameTrace], fields: dict):
+        self.phase = phase
+        self.trace = trace
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        if ENABLED:
+            PHASE_SECONDS.observe(seconds, self.phase)
+        if self.trace is not None:
+            self.trace.spans.append({"phase": self.phase, "start": self.start - self.trace.origin, "seconds": seconds, **self.fields})
+
+_NO_SPAN = nullcontext()
+
+def span(phase: str, trace: Optional[GameTrace] = None, **fields):
+    """Time a block as `phase`; with a trace, also keep the span and `fields` on it."""
+    if not ENABLED and trace is None:
+        return _NO_SPAN
+    return _Span(phase, trace, fields)
+
+def record_llm_call(model: str, prompt_tokens: int, completion_tokens: int):
+    if ENABLED:
+        LLM_TOKENS.observe(prompt_tokens, model, "prompt")
+        LLM_TOKENS.observe(completion_tokens, model, "completion")
+
+def record_action(invalid: bool):
+    if ENABLED:
+        ACTIONS.inc("invalid" if invalid else "valid")
+
+def record_stream_bytes(stream: str, size: int):
+    if ENABLED:
+        STREAM_BYTES.observe(size, stream)
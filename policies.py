@@ -0,0 +1,74 @@
+import random
+from typing import Callable, Dict
+from entities import PlayerState
+from rules import CompiledRules
+
+# A policy maps a player's visible game state to an action dict in the same
+# shape parse_action produces: {"name": ..., "parameters": [...]}. Costs and
+# values come from the state's own rules, so policies follow varied rules too.
+Policy = Callable[[PlayerState], dict]
+
+def _action(name: str, *parameters) -> dict:
+    return {"name": name, "parameters": [str(p) for p in parameters] or [""]}
+
+def _crop_value_per_day(rules: CompiledRules, crop_id: int) -> float:
+    return (rules.crop_base_yield[crop_id] * rules.crop_base_price[crop_id] - rules.crop_cost[crop_id]) / rules.crop_growth_time[crop_id]
+
+def rest_policy(state: PlayerState) -> dict:
+    return _action("Rest")
+
+def random_policy(state: PlayerState) -> dict:
+    crops = list(state.rules.crop_types)
+    plot = random.randint(1, len(state.plots))
+    choice = random.randrange(6)
+    if choice == 0:
+        return _action("Plant", random.choice(crops), plot)
+    if choice == 1:
+        return _action("Harvest", plot)
+    if choice == 2:
+        return _action("Maintenance", random.choice(list(state.rules.maintenance_types)), plot)
+    if choice == 3 and state.harvested_crops:
+        crop_type = random.choice(list(state.harvested_crops))
+        return _action("Sell", crop_type, state.harvested_crops[crop_type])
+    if choice == 4:
+        return _action("Buy", "plot")
+    return _action("Rest")
+
+def greedy_policy(state: PlayerState) -> dict:
+    """Harvest, sell, replant the most profitable affordable crop, otherwise rest."""
+    rules = state.rules
+    for i, plot in enumerate(state.plots, start=1):
+        if plot.crop and plot.crop.growth_progress >= 1.0 and state.energy >= rules.harvest_energy[rules.crop_index[plot.crop.type]]:
+            return _action("Harvest", i)
+
+    if state.energy >= rules.trade_energy[rules.market_index["local"]]:
+        for crop_type, amount in state.harvested_crops.items():
+            if amount > 0:
+                return _action("Sell", crop_type, amount)
+
+    vacant = [i for i, plot in enumerate(state.plots, start=1) if plot.crop is None]
+    if vacant:
+        affordable = [
+            crop_id for crop_id in range(len(rules.crop_types))
+            if rules.crop_cost[crop_id] <= state.money and rules.plant_energy[crop_id] <= state.energy
+        ]
+        if affordable:
+            best = max(affordable, key=lambda crop_id: _crop_value_per_day(rules, crop_id))
+            return _action("Plant", rules.crop_types[best], vacant[0])
+    else:
+        if state.money >= 3 * rules.plot_cost(len(state.plots)):
+            return _action("Buy", "plot")
+
+    return _action("Rest")
+
+# Deterministic policies that see the plots only as vacant, growing or mature.
+# While money, energy, crops and upgrades stay put they keep choosing the
+# same action, so a run of days on which they all rest can be fast-forwarded
+# up to the next crop maturity.
+EVENT_DRIVEN_POLICIES = {rest_policy, greedy_policy}
+
+POLICIES: Dict[str, Policy] = {
+    "rest": rest_policy,
+    "random": random_policy,
+    "greedy": greedy_policy,
+}
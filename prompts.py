@@ -0,0 +1,233 @@
+from typing import Optional
+import json
+from entities import PlayerState
+from constants import GAME_RULES
+
+# How the legacy prompt describes the state block that build_decision_message renders
+STATE_FORMAT = """    Day: [current day]
+    Season: [current season]
+    Weather: [current weather]
+    Money: [your current money]
+    Energy: [your current energy]
+    Plots:
+    [list of plot statuses]
+    Harvested Crops: [your harvested crops]
+    Upgrades: [your upgrades]
+    Invalid Actions: [number of invalid actions]
+    Action Log:
+    [list of your recent actions and their results]
+
+    Plot status will show if a plot is vacant or what crop is growing, including its growth percentage.
+    The Action Log provides a history of your recent actions and their outcomes, which can help inform your decision-making.
+    """
+
+COMPACT_STATE_FORMAT = """    Day [current day] | [season] | [weather] | Money [your money] | Energy [your energy] | Invalid actions [count]
+    Plots ([number of plots]): [crop and growth range]: [plot numbers] | ...
+    Harvested: [crop amount, ...]
+    Upgrades: [your upgrades]
+    Recent actions:
+    [your most recent actions and their results, oldest first]
+
+    Plots with the same crop and growth range are listed together: "Corn 50-74%: 3-5, 8" means plots 3, 4, 5 and 8 grow Corn that is 50% to 74% grown, and "Wheat mature" plots can be harvested. On large farms growing plots may only be counted.
+    """
+
+GROWTH_BUCKETS = ("0-24%", "25-49%", "50-74%", "75-99%")
+PLOT_NUMBERS_SHOWN = 10  # per group, when even grouped plots exceed the token budget
+
+def render_game_instructions(rules_text: str, state_format: str = STATE_FORMAT) -> str:
+    return f"""
+    You are playing a farming game. Here are the rules:
+    {rules_text}
+    
+    Available actions:
+    1. Plant(crop_name, plot_number)
+    2. Harvest(plot_number)
+    3. Buy(item_name, quantity)
+    4. Sell(crop_name, quantity, market_type)
+    5. Rest()
+    6. Maintenance(type_of_maintenance, plot_number)
+    7. BuyCooperative(upgrade_name)
+
+    Make decisions to maximize your score. Your score is calculated as:
+    Total money + Value of harvested crops
+
+    Important rules to remember:
+    - You can only harvest crops that have 100% grown. The growth time for each crop is specified in the rules above.
+    - Consider the best course of action, thinking through your decision step by step.
+    - You can only plant on plots that do not have a crop. If a plot already has a crop, you need to harvest it first before planting a new one.
+    - Each plot is numbered, starting from 1. Make sure you're using the correct plot number in your actions.
+    - Before harvesting or planting, check the state of your plots to ensure the action is valid.
+
+    Examples:
+    - Plant(Corn, 2) # To Plant Corn on plot 2 (only if plot 2 is vacant)
+    - Harvest(1) # To Harvest from plot 1 (only if the crop on plot 1 is 100% grown)
+    - Sell(Wheat, 10, local) # To Sell 10 Wheat in the local market
+    - Rest() # Rest
+    - Buy(Irrigation)  # To buy an individual upgrade
+    - Buy(Plot)  # To buy a plot
+    - Maintenance(water, 3) # To perform maintenance (water) on plot 3
+    - BuyCooperative(CommunityCenter)  # To buy a cooperative upgrade
+
+    Notes:
+    - You start with one plot (numbered 1).
+    - Plot numbers in commands start from 1.
+    - For buying plots or upgrades, you can use Buy(item_name) or Buy(item_name, 1). The quantity is ignored for these purchases.
+    - To buy cooperative upgrades, use the BuyCooperative action with the upgrade name.
+    - The Rest action doesn't require parameters.
+    - For actions with only one parameter, still use the format ActionName(parameter).
+    - Maintenance improves soil quality of the specified plot.
+    - Cooperative upgrades benefit both players and require coordination.
+    - Always check your current game state before making a decision to ensure your action is valid.
+
+    Your game state will be provided in this format:
+{state_format}"""
+
+def build_decision_message(game_instructions: str, player: str, day: int, state: PlayerState, plan_days: int = 1,
+                           game_rules: dict = GAME_RULES, action_log_count: Optional[int] = None) -> str:
+    if action_log_count is None:
+        action_log_count = game_rules["action_log_display_count"]
+    # Prepare game state information
+    game_info = {
+        "Day": day,
+        "Season": state.season,
+        "Weather": state.weather,
+        "Money": state.money,
+        "Energy": state.energy,
+        "Plots": chr(10).join(state.get_plot_status(game_rules)),
+        "Harvested Crops": state.harvested_crops,
+        "Upgrades": state.upgrades,
+        "Invalid Actions": state.invalid_action_count,
+        "Action Log": chr(10).join(state.action_log[-action_log_count:])  # Show last action_log_display_count actions
+    }
+    
+    # Ask agent for decision
+    if plan_days > 1:
+        return f"""
+            {game_instructions}
+            
+            Current game state:
+            {game_info}
+            
+            Make a plan for {player} based on this game state: one action per day for days {day} to {day + plan_days - 1}.
+            Respond with up to {plan_days} actions in order, one per line, each in the format: ActionName(parameter1, parameter2)
+            For actions with fewer than two parameters, use ActionName(parameter) or ActionName()
+            If one of the actions turns out to be invalid, the rest of the plan is dropped and you will be asked again.
+            """
+    return f"""
+            {game_instructions}
+            
+            Current game state:
+            {game_info}
+            
+            Make a decision for {player} based on this game state. 
+            Respond with a single action in the format: ActionName(parameter1, parameter2)
+            For actions with fewer than two parameters, use ActionName(parameter) or ActionName()
+            """
+
+def _plot_ranges(numbers) -> str:
+    # 1, 2, 3, 5 -> "1-3, 5"
+    ranges = []
+    start = previous = numbers[0]
+    for number in numbers[1:]:
+        if number != previous + 1:
+            ranges.append(f"{start}-{previous}" if previous > start else str(start))
+            start = number
+        previous = number
+    ranges.append(f"{start}-{previous}" if previous > start else str(start))
+    return ", ".join(ranges)
+
+def plot_groups(plots) -> dict:
+    """Plot numbers grouped by crop and growth range, in order of first plot."""
+    groups = {}
+    for i, plot in enumerate(plots, start=1):
+        crop = plot.crop
+        if crop is None:
+            key = "Vacant"
+        elif crop.growth_progress >= 1.0:
+            key = f"{crop.type} mature"
+        else:
+            key = f"{crop.type} {GROWTH_BUCKETS[min(int(crop.growth_progress * 4), 3)]}"
+        groups.setdefault(key, []).append(i)
+    return groups
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text and numbers
+    return (len(text) + 3) // 4
+
+class PromptBuilder:
+    """Decision prompts for one game.
+
+    The instructions prefix is rendered once and every prompt starts with the
+    same bytes, so providers that cache prompt prefixes can reuse it. By
+    default prompts are exactly those of build_decision_message. With
+    `compact`, the rules are embedded as compact JSON and the day's state is a
+    short summary with plots grouped by crop and growth range; when the
+    summary would exceed `token_budget` (estimated) tokens, older action log
+    lines are dropped first, then growing plots are only counted and finally
+    only the first few plot numbers of each group are listed.
+    """
+
+    def __init__(self, compact: bool = False, token_budget: Optional[int] = None, game_rules: dict = GAME_RULES):
+        self.compact = compact
+        self.token_budget = token_budget
+        self.rules = game_rules
+        self.action_log_count = game_rules["action_log_display_count"]
+        if compact:
+            rules_text = json.dumps(game_rules, separators=(",", ":"))
+            self.instructions = render_game_instructions(rules_text, COMPACT_STATE_FORMAT)
+            self.prefix = f"{self.instructions}\nCurrent game state:\n"
+        else:
+            self.instructions = render_game_instructions(str(game_rules))
+            self.prefix = ""
+
+    def build(self, player: str, day: int, state: PlayerState, plan_days: int = 1) -> str:
+        if not self.compact:
+            return build_decision_message(self.instructions, player, day, state, plan_days,
+                                          self.rules, self.action_log_count)
+        if plan_days > 1:
+            request = (f"Plan {player}'s actions for days {day} to {day + plan_days - 1}: up to {plan_days} actions in order, "
+                       f"one per line, each as ActionName(parameter1, parameter2). "
+                       f"If one turns out to be invalid, the rest of the plan is dropped and you will be asked again.")
+        else:
+            request = f"Decide {player}'s action for today. Respond with a single action: ActionName(parameter1, parameter2)"
+        return f"{self.prefix}{self.summarize(day, state)}\n\n{request}\n"
+
+    def summarize(self, day: int, state: PlayerState) -> str:
+        header = (f"Day {day} | {state.season} | {state.weather} | Money {state.money:.2f} | Energy {state.energy:g}"
+                  f" | Invalid actions {state.invalid_action_count}")
+        harvested = ", ".join(f"{crop} {amount}" for crop, amount in state.harvested_crops.items()) or "none"
+        upgrades = ", ".join(state.upgrades) or "none"
+        groups = plot_groups(state.plots)
+        action_log = list(state.action_log[-self.action_log_count:]) if self.action_log_count else []
+
+        def render(groups_text, log_lines):
+            lines = [header, f"Plots ({len(state.plots)}): {groups_text}", f"Harvested: {harvested}", f"Upgrades: {upgrades}"]
+            if log_lines:
+                lines.append("Recent actions:")
+                lines.extend(log_lines)
+            return "\n".join(lines)
+
+        groups_text = " | ".join(f"{key}: {_plot_ranges(numbers)}" for key, numbers in groups.items())
+        summary = render(groups_text, action_log)
+        if self.token_budget is None:
+            return summary
+        while action_log and estimate_tokens(summary) > self.token_budget:
+            action_log.pop(0)
+            summary = render(groups_text, action_log)
+        if estimate_tokens(summary) > self.token_budget:
+            # Vacant and mature plots are what actions need; growing ones are only counted
+            groups_text = " | ".join(
+                f"{key}: {_plot_ranges(numbers)}" if key == "Vacant" or key.endswith("mature") else f"{key}: {len(numbers)} plots"
+                for key, numbers in groups.items()
+            )
+            summary = render(groups_text, action_log)
+        if estimate_tokens(summary) > self.token_budget:
+            # Still too long: list only the first few numbers of each group
+            groups_text = " | ".join(
+                f"{key}: {_plot_ranges(numbers[:PLOT_NUMBERS_SHOWN])}"
+                + (f" and {len(numbers) - PLOT_NUMBERS_SHOWN} more" if len(numbers) > PLOT_NUMBERS_SHOWN else "")
+                if key == "Vacant" or key.endswith("mature") else f"{key}: {len(numbers)} plots"
+                for key, numbers in groups.items()
+            )
+            summary = render(groups_text, action_log)
+        return summary
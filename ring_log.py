@@ -0,0 +1,109 @@
+import json
+import os
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_LOG_WINDOW = 200
+
+class RingLog:
+    """Append-only log that keeps only the newest `window` entries in memory.
+
+    Indexing and len() refer to the whole log as if nothing had been
+    dropped, so `log[-5:]` and `log[n:]` (for n past the spilled part) work
+    exactly like on a list. Entries pushed out of the window are appended to
+    `spill_path` as JSON lines when one is given, and are otherwise discarded.
+    """
+
+    def __init__(self, entries: Iterable[str] = (), window: int = DEFAULT_LOG_WINDOW, spill_path: Optional[str] = None):
+        self.window = window
+        self.spill_path = spill_path
+        self._entries = deque(maxlen=window)
+        self._total = 0
+        self.extend(entries)
+
+    @property
+    def first_index(self) -> int:
+        """Absolute index of the oldest entry still in memory."""
+        return self._total - len(self._entries)
+
+    def append(self, entry: str):
+        if len(self._entries) == self.window and self.spill_path is not None:
+            with open(self.spill_path, "a") as f:
+                f.write(json.dumps(self._entries[0]) + "\n")
+        self._entries.append(entry)
+        self._total += 1
+
+    def extend(self, entries: Iterable[str]):
+        for entry in entries:
+            self.append(entry)
+
+    def restore(self, first_index: int, entries: Iterable[str]):
+        """Continue a log whose `entries` start at absolute index `first_index`, e.g. after a resume.
+
+        The spill file is cut back to the entries spilled before `first_index`,
+        so entries it received after that point are not spilled twice.
+        """
+        if self.spill_path is not None and os.path.exists(self.spill_path):
+            with open(self.spill_path, "rb+") as f:
+                for _ in range(first_index):
+                    if not f.readline():
+                        break
+                f.truncate(f.tell())
+        self._entries.clear()
+        self._total = first_index
+        self.extend(entries)
+
+    def copy(self) -> "RingLog":
+        """An in-memory copy of the window; it never writes to this log's spill file."""
+        log = RingLog(window=self.window)
+        log._entries = deque(self._entries, maxlen=self.window)
+        log._total = self._total
+        return log
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __iter__(self) -> Iterator[str]:
+        # Only the in-memory window; read_all() includes spilled entries
+        return iter(self._entries)
+
+    def __bool__(self) -> bool:
+        return self._total > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._total)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= self.first_index:
+                offset = self.first_index
+                return list(islice(self._entries, max(0, start - offset), max(0, stop - offset)))
+            available = self.read_all()
+            base = self._total - len(available)  # entries dropped without a spill file
+            return available[max(0, start - base):max(0, stop - base)]
+        if index < 0:
+            index += self._total
+        if not 0 <= index < self._total:
+            raise IndexError("log index out of range")
+        if index >= self.first_index:
+            return self._entries[index - self.first_index]
+        available = self.read_all()
+        base = self._total - len(available)
+        if index < base:
+            raise IndexError("log entry is no longer retained")
+        return available[index - base]
+
+    def read_all(self) -> List[str]:
+        """Every entry still available: spilled ones from disk, then the window."""
+        spilled = []
+        if self.spill_path is not None:
+            try:
+                with open(self.spill_path, "r") as f:
+                    spilled = [json.loads(line) for line in f]
+            except FileNotFoundError:
+                pass
+        return spilled + list(self._entries)
+
+    def __repr__(self) -> str:
+        return f"RingLog({list(self._entries)!r}, total={self._total})"
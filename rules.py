@@ -0,0 +1,179 @@
+import copy
+from typing import Any, Dict, List, Sequence
+import numpy as np
+from constants import GAME_RULES
+
+UPGRADE_EFFECTS = ("water_saving", "weather_protection", "yield_boost", "energy_saving")
+SEASON_LENGTH = 30  # days per season
+MARKET_TYPES = ("local", "global")
+
+class UpgradeModifiers:
+    """Summed effects of a player's upgrades, in the order they were bought."""
+    __slots__ = UPGRADE_EFFECTS
+
+    def __init__(self, water_saving: float = 0, weather_protection: float = 0, yield_boost: float = 0, energy_saving: float = 0):
+        self.water_saving = water_saving
+        self.weather_protection = weather_protection
+        self.yield_boost = yield_boost
+        self.energy_saving = energy_saving
+
+class RuleArrays:
+    """NumPy views of the flat rule tables, for the batch engine."""
+
+    def __init__(self, rules: "CompiledRules"):
+        # Integer tables stay int64 unless a varied rule set made them fractional
+        self.crop_cost = np.array(rules.crop_cost)
+        self.crop_growth_time = np.array(rules.crop_growth_time, dtype=np.int64)
+        self.crop_base_yield = np.array(rules.crop_base_yield)
+        self.crop_base_price = np.array(rules.crop_base_price)
+        self.plant_energy = np.array(rules.plant_energy, dtype=np.int64)
+        self.harvest_energy = np.array(rules.harvest_energy, dtype=np.int64)
+        self.maintenance_energy = np.array(rules.maintenance_energy, dtype=np.int64)
+        self.weather_growth = np.array(rules.weather_growth)
+        self.weather_yield = np.array(rules.weather_yield)
+        self.weather_probabilities = np.array(rules.weather_probabilities)
+        self.buyer_price_offsets = np.array(rules.buyer_price_offsets)
+        self.upgrade_cost = np.array(rules.upgrade_cost, dtype=np.int64)
+        self.upgrade_is_cooperative = np.array(rules.upgrade_is_cooperative)
+        self.upgrade_effects = {effect: np.array(values, dtype=float) for effect, values in rules.upgrade_effects.items()}
+
+class CompiledRules:
+    """A GAME_RULES dict flattened into integer ids and per-id tables.
+
+    Names map to ids through the *_index dicts; every per-crop, per-weather
+    and per-upgrade value is then a tuple lookup instead of a nested
+    string-keyed dict chain.
+    """
+
+    def __init__(self, game_rules: dict):
+        self.raw = game_rules
+        self.total_days = game_rules["total_days"]
+        self.starting_money = game_rules["starting_money"]
+        self.max_energy = game_rules["max_energy"]
+        self.energy_regen_per_day = game_rules["energy_regen_per_day"]
+        self.invalid_action_penalty = game_rules["invalid_action_penalty"]
+        self.action_log_display_count = game_rules["action_log_display_count"]
+
+        self.seasons = tuple(game_rules["seasons"])
+        self.season_index = _index(self.seasons)
+        self.weather_types = tuple(game_rules["weather_types"])
+        self.weather_index = _index(self.weather_types)
+        self.weather_probabilities = tuple(tuple(game_rules["weather_probabilities"][s]) for s in self.seasons)
+        self.weather_growth = tuple(game_rules["weather_effects"][w]["growth"] for w in self.weather_types)
+        self.weather_yield = tuple(game_rules["weather_effects"][w]["yield"] for w in self.weather_types)
+
+        crops = game_rules["crops"]
+        self.crop_types = tuple(crops)
+        self.crop_index = _index(self.crop_types)
+        self.crop_cost = tuple(crops[c]["cost"] for c in self.crop_types)
+        self.crop_growth_time = tuple(crops[c]["base_growth_time"] for c in self.crop_types)
+        self.crop_base_yield = tuple(crops[c]["base_yield"] for c in self.crop_types)
+        self.crop_base_price = tuple(crops[c]["base_price"] for c in self.crop_types)
+        self.crop_hardiness = tuple(crops[c]["hardiness"] for c in self.crop_types)
+
+        energy_cost = game_rules["energy_cost"]
+        self.plant_energy = tuple(energy_cost["plant"][c] for c in self.crop_types)
+        self.harvest_energy = tuple(energy_cost["harvest"][c] for c in self.crop_types)
+        self.maintenance_types = tuple(energy_cost["maintenance"])
+        self.maintenance_index = _index(self.maintenance_types)
+        self.maintenance_energy = tuple(energy_cost["maintenance"][m] for m in self.maintenance_types)
+        self.market_index = _index(MARKET_TYPES)
+        self.trade_energy = tuple(energy_cost["trade"][m] for m in MARKET_TYPES)
+
+        soil = game_rules["soil_quality"]
+        self.soil_depletion_rate = soil["depletion_rate"]
+        self.soil_maintenance_improvement = soil["maintenance_improvement"]
+        self.soil_yield_factor = soil["yield_factor"]
+
+        market = game_rules["market"]
+        self.market_price_factor = (market["local_price_factor"], market["global_price_factor"])
+        self.max_price_fluctuation = market["max_price_fluctuation"]
+        self.trend_duration = market["trend_duration"]
+        levels = market["buyer_levels"]
+        self.buyer_price_offsets = tuple(
+            self.max_price_fluctuation * (1 - 2 * i / (levels - 1)) if levels > 1 else 0.0 for i in range(levels)
+        )
+        self.buyer_quantity = market["buyer_quantity"]
+        self.market_decay = market["decay"]
+
+        upgrades = dict(game_rules["upgrades"], **game_rules["cooperative_upgrades"])
+        self.upgrade_types = tuple(upgrades)
+        self.upgrade_index = _index(self.upgrade_types)
+        self.individual_upgrades = frozenset(game_rules["upgrades"])
+        self.cooperative_upgrades = frozenset(game_rules["cooperative_upgrades"])
+        self.upgrade_cost = tuple(upgrades[u]["cost"] for u in self.upgrade_types)
+        self.upgrade_is_cooperative = tuple(u in self.cooperative_upgrades for u in self.upgrade_types)
+        self.upgrade_effects = {effect: tuple(upgrades[u].get(effect, 0) for u in self.upgrade_types) for effect in UPGRADE_EFFECTS}
+        # Effects each upgrade actually defines, so modifiers are summed exactly
+        # like the original per-key membership checks
+        self._upgrade_effect_items = tuple(
+            tuple((effect, upgrades[u][effect]) for effect in UPGRADE_EFFECTS if effect in upgrades[u])
+            for u in self.upgrade_types
+        )
+
+        self.plot_base_cost = game_rules["plot_purchase"]["base_cost"]
+        self.plot_cost_increase_factor = game_rules["plot_purchase"]["cost_increase_factor"]
+        self._plot_costs: List[float] = []
+
+        self.arrays = RuleArrays(self)
+
+    def with_overrides(self, overrides: Dict[str, Any]) -> "CompiledRules":
+        """New rules with values replaced by dotted path, e.g. {"market.local_price_factor": 0.9}.
+
+        Each value must have the shape of the one it replaces: a number for a
+        number, a list of the same length, a dict with the same keys.
+        """
+        game_rules = copy.deepcopy(self.raw)
+        for path, value in overrides.items():
+            *parents, key = path.split(".")
+            node = game_rules
+            for name in parents:
+                node = node.get(name) if isinstance(node, dict) else None
+                if node is None:
+                    raise KeyError(f"Unknown rule: {path}")
+            if not isinstance(node, dict) or key not in node:
+                raise KeyError(f"Unknown rule: {path}")
+            if not _same_shape(node[key], value):
+                raise TypeError(f"Rule {path} takes a value like {node[key]!r}, got {value!r}")
+            node[key] = value
+        return CompiledRules(game_rules)
+
+    def season_for_day(self, day: int) -> int:
+        return ((day - 1) // SEASON_LENGTH) % len(self.seasons)
+
+    def plot_cost(self, current_plots: int) -> float:
+        return self.plot_costs(current_plots)[current_plots]
+
+    def plot_costs(self, max_plots: int) -> List[float]:
+        """Cost of buying plot n+1 when owning n plots, for n up to `max_plots`."""
+        while len(self._plot_costs) <= max_plots:
+            n = len(self._plot_costs)
+            self._plot_costs.append(self.plot_base_cost * (self.plot_cost_increase_factor ** n))
+        return self._plot_costs
+
+    def upgrade_modifiers(self, upgrades: Sequence[str]) -> UpgradeModifiers:
+        modifiers = UpgradeModifiers()
+        for upgrade in upgrades:
+            upgrade_id = self.upgrade_index.get(upgrade)
+            if upgrade_id is None:
+                continue
+            for effect, value in self._upgrade_effect_items[upgrade_id]:
+                setattr(modifiers, effect, getattr(modifiers, effect) + value)
+        return modifiers
+
+def _same_shape(old: Any, new: Any) -> bool:
+    # Integers and floats are interchangeable, so tables may be varied fractionally
+    if isinstance(old, bool) or isinstance(new, bool):
+        return isinstance(old, bool) and isinstance(new, bool)
+    if isinstance(old, (int, float)):
+        return isinstance(new, (int, float))
+    if isinstance(old, list):
+        return isinstance(new, list) and len(new) == len(old) and all(map(_same_shape, old, new))
+    if isinstance(old, dict):
+        return isinstance(new, dict) and new.keys() == old.keys() and all(_same_shape(old[k], new[k]) for k in old)
+    return type(new) is type(old)
+
+def _index(names: Sequence[str]) -> Dict[str, int]:
+    return {name: i for i, name in enumerate(names)}
+
+RULES = CompiledRules(GAME_RULES)
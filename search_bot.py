@@ -0,0 +1,199 @@
+import argparse
+import random
+import sys
+from typing import List, Optional, Sequence, Tuple
+from entities import MarketState, PlayerState, PlotState
+from game_logic import apply_player_action, calculate_final_score, clear_market, process_action, process_day
+from game_rng import GameRNG
+from policies import Policy, greedy_policy
+from rules import RULES, CompiledRules
+
+# Lookahead bots that play against the real rules in game_logic. Every branch
+# of the search works on clones of the players and the market: a clone shares
+# its plots with the state it was taken from until either side changes them
+# (PlayerState.writable_plots), so a branch only pays for what it touches.
+#
+#   python search_bot.py --depth 1 --games 20   # fails unless the bot outscores greedy_policy
+
+REST_ACTION = {"name": "Rest", "parameters": [""]}
+
+# Share of the local sale value credited to crops that are held, growing, or
+# could still be planted on a vacant plot. Each step towards a sale is worth
+# more than the one before it, and a held crop less than selling at the
+# auction's lowest buyer price, so the search plants, harvests and sells.
+HELD_CROP_WEIGHT = 0.7
+GROWING_CROP_WEIGHT = 0.6
+VACANT_PLOT_WEIGHT = 0.3
+
+def _action(name: str, *parameters) -> dict:
+    return {"name": name, "parameters": [str(p) for p in parameters] or [""]}
+
+def clone_world(players: Sequence[PlayerState], market: MarketState) -> Tuple[List[PlayerState], MarketState]:
+    """Copies of `players` and `market` that the search can play on without touching the originals."""
+    clones = [state.clone(keep_action_log=False) for state in players]
+    return clones, market.clone(players, clones)
+
+def candidate_actions(state: PlayerState) -> List[dict]:
+    """A short list of sensible moves: harvest, sell, plant, buy a plot, or rest.
+
+    Rest comes last, so when acting now and acting later lead to the same
+    value the search acts now.
+    """
+    rules = state.rules
+    actions = []
+    vacant = None
+    for i, plot in enumerate(state.plots, start=1):
+        crop = plot.crop
+        if crop is None:
+            if vacant is None:
+                vacant = i
+        elif crop.growth_progress >= 1.0 and state.energy >= rules.harvest_energy[rules.crop_index[crop.type]]:
+            actions.append(_action("Harvest", i))
+    if state.energy >= rules.trade_energy[rules.market_index["local"]]:
+        for crop_type, amount in state.harvested_crops.items():
+            if amount > 0:
+                actions.append(_action("Sell", crop_type, amount))
+    if vacant is not None:
+        for crop_id, crop_type in enumerate(rules.crop_types):
+            if rules.crop_cost[crop_id] <= state.money and rules.plant_energy[crop_id] <= state.energy:
+                actions.append(_action("Plant", crop_type, vacant))
+    elif state.money >= rules.plot_cost(len(state.plots)):
+        actions.append(_action("Buy", "plot"))
+    actions.append(REST_ACTION)
+    return actions
+
+def evaluate(state: PlayerState, market: MarketState) -> float:
+    """The final score if the game ended after today's auction, plus part of the value of crops yet to be sold.
+
+    Clears `market`, so it must be a throwaway clone.
+    """
+    rules = state.rules
+    days_left = rules.total_days - state.day
+    local = rules.market_price_factor[rules.market_index["local"]]
+    clear_market(market)
+    held = dict(state.harvested_crops)
+    value = calculate_final_score(state)
+    for crop_type, amount in held.items():
+        value += HELD_CROP_WEIGHT * amount * rules.crop_base_price[rules.crop_index[crop_type]] * local
+    # The most a vacant plot can still earn from one crop that matures in time
+    best_crop = max((rules.crop_base_yield[crop_id] * rules.crop_base_price[crop_id] * local - rules.crop_cost[crop_id]
+                     for crop_id in range(len(rules.crop_types)) if rules.crop_growth_time[crop_id] <= days_left),
+                    default=0.0)
+    for plot in state.plots:
+        crop = plot.crop
+        soil_factor = 1 + (plot.soil_quality - 1) * rules.soil_yield_factor
+        if crop is None:
+            value += VACANT_PLOT_WEIGHT * max(best_crop * soil_factor, 0.0)
+            continue
+        crop_id = rules.crop_index[crop.type]
+        # A crop that cannot mature before the game ends is worth nothing
+        if crop.growth_progress + days_left / rules.crop_growth_time[crop_id] < 1.0:
+            continue
+        crop_yield = rules.crop_base_yield[crop_id] * soil_factor * crop.quality
+        value += GROWING_CROP_WEIGHT * crop_yield * rules.crop_base_price[crop_id] * local
+    return value
+
+class SearchBot:
+    """Expectimax over the next days' weather, assuming the other players rest.
+
+    Each decision tries every candidate action, then for `depth` days
+    averages over the season's weather probabilities and takes the best
+    candidate again. Market trends are held at their current values so the
+    search never draws from the game's random generators.
+
+    With a `surrogate` (surrogate.ActionValueModel), only the `keep`
+    candidates it rates highest are searched at every decision.
+    """
+
+    def __init__(self, depth: int = 2, surrogate=None, keep: int = 3):
+        self.depth = depth
+        self.surrogate = surrogate
+        self.keep = keep
+
+    def candidates(self, state: PlayerState, market: MarketState) -> List[dict]:
+        actions = candidate_actions(state)
+        if self.surrogate is not None and len(actions) > self.keep:
+            actions = self.surrogate.screen(state, market, actions, self.keep)
+        return actions
+
+    def choose(self, player: int, players: Sequence[PlayerState], market: MarketState) -> dict:
+        best_action, best_value = REST_ACTION, None
+        for action in self.candidates(players[player], market):
+            value = self._after_action(player, players, market, action, self.depth)
+            if best_value is None or value > best_value:
+                best_action, best_value = action, value
+        return best_action
+
+    def _after_action(self, player: int, players: Sequence[PlayerState], market: MarketState,
+                      action: dict, depth: int) -> float:
+        clones, market = clone_world(players, market)
+        process_action(clones[player], market, action)
+        if depth == 0 or clones[player].day >= clones[player].rules.total_days:
+            return evaluate(clones[player], market)
+        return self._next_day(player, clones, market, depth)
+
+    def _next_day(self, player: int, players: Sequence[PlayerState], market: MarketState, depth: int) -> float:
+        rules = players[0].rules
+        season = rules.season_for_day(players[0].day + 1)
+        trends = [state.market_trends for state in players]
+        expected = 0.0
+        for weather, probability in zip(rules.weather_types, rules.weather_probabilities[season]):
+            if probability <= 0:
+                continue
+            clones, day_market = clone_world(players, market)
+            process_day(clones, day_market, weather=weather, market_trends=trends)
+            expected += probability * max(
+                self._after_action(player, clones, day_market, action, depth - 1)
+                for action in self.candidates(clones[player], day_market)
+            )
+        return expected
+
+class _PolicyBot:
+    # A scripted policy in a bot's seat, for comparisons on equal terms
+    def __init__(self, policy: Policy):
+        self.policy = policy
+
+    def choose(self, player: int, players: Sequence[PlayerState], market: MarketState) -> dict:
+        return self.policy(players[player])
+
+def play_against(bot, opponent: Policy, seed: Optional[int] = None, rules: CompiledRules = RULES) -> Tuple[float, float]:
+    """Final scores of a headless game between `bot` as Player 1 and a scripted `opponent`."""
+    if seed is not None:
+        random.seed(seed)
+    rng = GameRNG(seed, rules=rules)
+    market = MarketState(rules=rules)
+    players = [PlayerState(money=rules.starting_money, energy=rules.max_energy, plots=[PlotState()], rules=rules)
+               for _ in range(2)]
+    for day in range(1, rules.total_days + 1):
+        if day > 1:
+            process_day(players, market, rng=rng)
+        apply_player_action(players[0], players, market, bot.choose(0, players, market))
+        apply_player_action(players[1], players, market, opponent(players[1]))
+    clear_market(market)
+    return calculate_final_score(players[0]), calculate_final_score(players[1])
+
+def strength_check(depth: int = 1, games: int = 20, seed: int = 0) -> dict:
+    """Mean Player 1 scores of a depth-`depth` SearchBot and of greedy_policy, both against greedy_policy on the same seeds."""
+    seeds = range(seed, seed + games)
+    bot = [play_against(SearchBot(depth), greedy_policy, s)[0] for s in seeds]
+    greedy = [play_against(_PolicyBot(greedy_policy), greedy_policy, s)[0] for s in seeds]
+    return {
+        "bot": sum(bot) / games, "greedy": sum(greedy) / games,
+        "bot_wins": sum(b > g for b, g in zip(bot, greedy)), "games": games,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a SearchBot scores at least as well as greedy_policy")
+    parser.add_argument("--depth", type=int, default=1)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = strength_check(args.depth, args.games, args.seed)
+    print(f"depth {args.depth}: {result['bot']:.1f} against greedy's {result['greedy']:.1f}, "
+          f"better on {result['bot_wins']} of {result['games']} seeds")
+    if result["bot"] < result["greedy"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
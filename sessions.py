@@ -0,0 +1,114 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, Optional
+from broadcast import GameBroadcaster
+from deltas import DeltaEncoder, EventHistory
+
+def new_game_state() -> dict:
+    return {
+        "players": [],
+        "shared_market": None,
+        "game_log": [],
+        "current_day": 1,
+        "game_over": False
+    }
+
+class SessionLimitError(Exception):
+    pass
+
+class GameSession:
+    """Everything app.py used to keep in module globals, for one game."""
+
+    def __init__(self, game_id: str, first_day: int = 1):
+        self.game_id = game_id
+        self.game_state = new_game_state()
+        self.game_task: Optional[asyncio.Task] = None
+        self.stop_event = asyncio.Event()
+        # The game task is the single producer; HTTP streams subscribe here
+        self.broadcaster = GameBroadcaster()
+        # Per-day SSE deltas, numbered and retained for Last-Event-ID resume
+        self.delta_encoder = DeltaEncoder()
+        # A resumed game keeps the same id, so its event ids and state
+        # versions continue from the last journaled day (one of each per day)
+        # and earlier Last-Event-IDs and ETags cannot match later days
+        self.events = EventHistory(last_id=first_day - 1)
+        # Timing spans of this game, when traces are enabled
+        self.trace = None
+        # Bumped once per processed day, together with a snapshot of the
+        # state; encoded /game_state bodies are cached per field selection
+        # until it changes
+        self.state_snapshot = self.game_state
+        self.state_version = first_day - 1
+        self.state_cache: Dict[Optional[tuple], tuple] = {}
+        self.state_cache_version = self.state_version
+        self.last_active = time.monotonic()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    @property
+    def running(self) -> bool:
+        return self.game_task is not None and not self.game_task.done()
+
+    async def stop(self, timeout: float = 5.0):
+        self.stop_event.set()
+        if self.game_task:
+            try:
+                await asyncio.wait_for(self.game_task, timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"Game {self.game_id} didn't finish in time, forcefully cancelling")
+                self.game_task.cancel()
+            except asyncio.CancelledError:
+                pass
+            self.game_task = None
+
+class SessionRegistry:
+    """Game sessions keyed by game id, with a cap on running games.
+
+    Finished sessions stay queryable until they have been idle (no stream
+    updates and no polling) for `idle_timeout` seconds, then the reaper drops
+    them. Running sessions that go idle are stopped first.
+    """
+
+    def __init__(self, max_running: int = 4, idle_timeout: float = 1800):
+        self.max_running = max_running
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[str, GameSession] = {}
+
+    def running_count(self) -> int:
+        return sum(1 for session in self.sessions.values() if session.running)
+
+    def create(self, game_id: Optional[str] = None, first_day: int = 1) -> GameSession:
+        if self.running_count() >= self.max_running:
+            raise SessionLimitError(f"Too many games in progress (limit {self.max_running})")
+        session = GameSession(game_id or uuid.uuid4().hex, first_day)
+        self.sessions[session.game_id] = session
+        return session
+
+    def get(self, game_id: str) -> Optional[GameSession]:
+        session = self.sessions.get(game_id)
+        if session is not None:
+            session.touch()
+        return session
+
+    async def remove(self, game_id: str):
+        session = self.sessions.pop(game_id, None)
+        if session is not None:
+            await session.stop()
+
+    async def reap_idle(self):
+        now = time.monotonic()
+        idle = [game_id for game_id, session in self.sessions.items() if now - session.last_active > self.idle_timeout]
+        for game_id in idle:
+            print(f"Reaping idle game {game_id}")
+            await self.remove(game_id)
+
+    async def run_reaper(self, interval: float = 60):
+        while True:
+            await asyncio.sleep(interval)
+            await self.reap_idle()
+
+    async def close(self):
+        for game_id in list(self.sessions):
+            await self.remove(game_id)
@@ -1,4 +1,5 @@
 let gameInProgress = false;
+let gameId = null;
 
 let player1Chart, player2Chart;
 const player1Data = [];
@@ -183,6 +184,10 @@ document.addEventListener('DOMContentLoaded', () => {
 
         try {
             const response = await fetch('/start_game', { method: 'POST' });
+            if (!response.ok) {
+                throw new Error(`Failed to start the game: ${response.status}`);
+            }
+            gameId = response.headers.get('X-Game-Id');
             gameStream = response.body.getReader();
             const decoder = new TextDecoder();
     
@@ -200,7 +205,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 } else {
                     console.log(`Day ${data.day} processed`);
                     await updateGameState();
-                    updateCharts(data.day, data.player1_action, data.player2_action);
+                    updateCharts(data.day, data.actions[0], data.actions[1]);
                 }
             }
         } catch (error) {
@@ -223,7 +228,7 @@ document.addEventListener('DOMContentLoaded', () => {
         stopGameBtn.disabled = true;
         
         try {
-            const response = await fetch('/stop_game', { method: 'POST' });
+            const response = await fetch(`/stop_game?game_id=${encodeURIComponent(gameId)}`, { method: 'POST' });
             if (!response.ok) {
                 throw new Error('Failed to stop the game');
             }
@@ -237,34 +242,36 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     async function updateGameState() {
-        const response = await fetch('/game_state');
+        const response = await fetch(`/game_state?game_id=${encodeURIComponent(gameId)}`);
         const gameState = await response.json();
         
         // Update game info
         const seasonElement = document.getElementById('currentSeason');
         const weatherElement = document.getElementById('currentWeather');
         
-        seasonElement.textContent = getSeasonEmoticon(gameState.player1.season);
-        weatherElement.textContent = getWeatherEmoticon(gameState.player1.weather);
+        // The page shows the first two players of the game
+        const [player1, player2] = gameState.players;
+        seasonElement.textContent = getSeasonEmoticon(player1.season);
+        weatherElement.textContent = getWeatherEmoticon(player1.weather);
         
         seasonElement.classList.add('large-emoticon');
         weatherElement.classList.add('large-emoticon');
         
         // Update player farms
-        updateFarm('player1', gameState.player1);
-        updateFarm('player2', gameState.player2);
+        updateFarm('player1', player1);
+        updateFarm('player2', player2);
         
         // Update player stats
-        document.getElementById('player1Money').textContent = gameState.player1.money;
-        document.getElementById('player1Energy').textContent = gameState.player1.energy;
-        document.getElementById('player2Money').textContent = gameState.player2.money;
-        document.getElementById('player2Energy').textContent = gameState.player2.energy;
+        document.getElementById('player1Money').textContent = player1.money;
+        document.getElementById('player1Energy').textContent = player1.energy;
+        document.getElementById('player2Money').textContent = player2.money;
+        document.getElementById('player2Energy').textContent = player2.energy;
         
         // Update game log
         player1LogEntries.innerHTML = '';
         player2LogEntries.innerHTML = '';
 
-        gameState.game_log.forEach((entry, index) => {
+        gameState.game_log.forEach((entry) => {
             const p = document.createElement('p');
             p.textContent = entry;
             
@@ -277,9 +284,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 p.classList.add('success-message');
             }
             
-            if (index % 2 === 0) {
+            if (entry.includes(', Player 1:')) {
                 player1LogEntries.appendChild(p);
-            } else {
+            } else if (entry.includes(', Player 2:')) {
                 player2LogEntries.appendChild(p);
             }
         });
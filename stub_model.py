@@ -0,0 +1,58 @@
+import argparse
+import re
+import time
+import uuid
+from fastapi import FastAPI, Request
+from constants import GAME_RULES
+
+# A local stand-in for the OpenAI chat completions API. Point an agent's
+# llm config at it with {"model": "stub", "base_url": "http://127.0.0.1:8001/v1",
+# "api_key": "stub"} to run games and tournaments without network access.
+# It reads the game state out of the prompt and answers with a simple rule:
+# harvest a mature plot, sell harvested crops, plant a vacant plot, or rest.
+
+app = FastAPI()
+
+CHEAPEST_CROP = min(GAME_RULES["crops"], key=lambda crop: GAME_RULES["crops"][crop]["cost"])
+
+def choose_action(prompt: str) -> str:
+    state = prompt.rsplit("Current game state:", 1)[-1]
+    # Full prompts list "Plot 2: Wheat (Mature, ...)", compact ones "Wheat mature: 2, 5"
+    mature = re.search(r"Plot (\d+): \w+ \(Mature", state) or re.search(r"\w+ mature: (\d+)", state)
+    if mature:
+        return f"Harvest({mature.group(1)})"
+    harvested = re.search(r"'Harvested Crops': \{'(\w+)': (\d+)", state) or re.search(r"Harvested: (\w+) (\d+)", state)
+    if harvested and int(harvested.group(2)) > 0:
+        return f"Sell({harvested.group(1)}, {harvested.group(2)}, local)"
+    vacant = re.search(r"Plot (\d+): Vacant", state) or re.search(r"Vacant: (\d+)", state)
+    money = re.search(r"'Money': ([\d.]+)", state) or re.search(r"Money ([\d.]+)", state)
+    if vacant and money and float(money.group(1)) >= GAME_RULES["crops"][CHEAPEST_CROP]["cost"]:
+        return f"Plant({CHEAPEST_CROP}, {vacant.group(1)})"
+    return "Rest()"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    prompt = messages[-1].get("content", "") if messages else ""
+    if isinstance(prompt, list):  # content parts
+        prompt = "".join(part.get("text", "") for part in prompt)
+    content = choose_action(prompt)
+    prompt_tokens = sum(len(str(message.get("content", ""))) for message in messages) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                  "total_tokens": prompt_tokens + len(content) // 4},
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve a stub OpenAI-compatible model for local games")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,152 @@
+import argparse
+import json
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import GroupShuffleSplit
+from entities import MarketState, PlayerState
+from search_bot import REST_ACTION, candidate_actions
+from trajectories import encode_action, encode_state, read_dataset
+
+# Gradient-boosted estimate of a decision's value: the final score a player
+# reaches after taking an action in a state, under the epsilon-greedy play
+# the dataset was recorded with. Scoring a batch of candidates is one
+# tree-ensemble prediction, cheap enough to screen actions before a search
+# or to rank them outright.
+
+# Batches smaller than this go through CompiledTrees instead of xgboost
+SMALL_BATCH = 32
+
+def features(states: np.ndarray, actions: np.ndarray) -> np.ndarray:
+    return np.hstack([states, actions]).astype(np.float32, copy=False)
+
+class CompiledTrees:
+    """A regression booster's trees as flat numpy arrays, walked one level at a time for all trees at once.
+
+    xgboost's own predict has close to a millisecond of fixed cost per call,
+    so for the handful of candidates of one decision walking the trees here
+    is several times faster. All trees' nodes share one numbering; leaves
+    point back at themselves, so every row can take the same number of steps.
+    """
+
+    def __init__(self, booster: xgb.Booster):
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        trees = learner["gradient_booster"]["model"]["trees"]
+        self.base_score = float(learner["learner_model_param"]["base_score"])
+        feature, threshold, children, default_left, leaf_value, roots = [], [], [], [], [], []
+        self.depth = 0
+        offset = 0
+        for tree in trees:
+            left = np.array(tree["left_children"])
+            right = np.array(tree["right_children"])
+            leaf = left == -1
+            nodes = np.arange(len(left))
+            # Leaves keep their value in split_conditions
+            conditions = np.array(tree["split_conditions"], dtype=np.float32)
+            roots.append(offset)
+            feature.append(tree["split_indices"])
+            threshold.append(conditions)
+            # children[2 * node] is the left child, children[2 * node + 1] the right one
+            children.append(np.stack([np.where(leaf, nodes, left), np.where(leaf, nodes, right)], axis=1).ravel() + offset)
+            default_left.append(tree["default_left"])
+            leaf_value.append(np.where(leaf, conditions, 0))
+            # Children always come after their parent
+            depth = np.zeros(len(left), dtype=np.int64)
+            for node in np.flatnonzero(~leaf):
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+            self.depth = max(self.depth, int(depth.max()))
+            offset += len(left)
+        self.feature = np.concatenate(feature).astype(np.int64)
+        self.threshold = np.concatenate(threshold)
+        self.children = np.concatenate(children)
+        self.default_left = np.concatenate(default_left).astype(bool)
+        self.leaf_value = np.concatenate(leaf_value)
+        self.roots = np.array(roots, dtype=np.int64)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        node = np.broadcast_to(self.roots, (len(x), len(self.roots)))
+        missing = np.isnan(x).any()
+        for _ in range(self.depth):
+            value = np.take_along_axis(x, self.feature[node], axis=1)
+            go_right = ~(value < self.threshold[node])
+            if missing:
+                go_right &= ~(np.isnan(value) & self.default_left[node])
+            node = self.children[2 * node + go_right]
+        return self.base_score + self.leaf_value[node].sum(axis=1)
+
+class ActionValueModel:
+    def __init__(self, booster: xgb.Booster):
+        self.booster = booster
+        self.trees = CompiledTrees(booster)
+
+    @classmethod
+    def train(cls, dataset: Dict[str, np.ndarray], n_estimators: int = 300, max_depth: int = 6,
+              learning_rate: float = 0.1, holdout: float = 0.2, seed: int = 0) -> Tuple["ActionValueModel", dict]:
+        """Fit on `dataset` (see trajectories.py) and report accuracy on a holdout of whole games."""
+        x = features(np.asarray(dataset["state"]), np.asarray(dataset["action"]))
+        y = np.asarray(dataset["final_score"])
+        # Rows of one game share their final score, so games are split, not rows
+        split = GroupShuffleSplit(n_splits=1, test_size=holdout, random_state=seed)
+        train_rows, test_rows = next(split.split(x, y, groups=np.asarray(dataset["game"])))
+        regressor = xgb.XGBRegressor(n_estimators=n_estimators, max_depth=max_depth, learning_rate=learning_rate,
+                                     tree_method="hist", random_state=seed)
+        regressor.fit(x[train_rows], y[train_rows])
+        model = cls(regressor.get_booster())
+        predicted = model.booster.inplace_predict(x[test_rows])
+        report = {
+            "train_rows": len(train_rows), "test_rows": len(test_rows),
+            "r2": float(r2_score(y[test_rows], predicted)),
+            "mae": float(mean_absolute_error(y[test_rows], predicted)),
+        }
+        return model, report
+
+    def predict(self, states: np.ndarray, actions: np.ndarray) -> np.ndarray:
+        x = features(states, actions)
+        if len(x) < SMALL_BATCH:
+            return self.trees.predict(x)
+        return self.booster.inplace_predict(x)
+
+    def rank(self, state: PlayerState, market: MarketState, actions: Sequence[dict]) -> List[Tuple[float, dict]]:
+        """(value, action) pairs for `actions` in `state`, best first."""
+        encoded = encode_state(state, market)
+        values = self.predict(np.broadcast_to(encoded, (len(actions), len(encoded))),
+                              np.array([encode_action(state, action) for action in actions]))
+        order = np.argsort(-values, kind="stable")
+        return [(float(values[i]), actions[i]) for i in order]
+
+    def screen(self, state: PlayerState, market: MarketState, actions: Sequence[dict], keep: int) -> List[dict]:
+        """The `keep` actions with the highest predicted value."""
+        return [action for _, action in self.rank(state, market, actions)[:keep]]
+
+    def choose(self, player: int, players: Sequence[PlayerState], market: MarketState) -> dict:
+        """The best-looking candidate action, so the model can take a seat in run_game like a SearchBot."""
+        actions = candidate_actions(players[player])
+        return self.rank(players[player], market, actions)[0][1] if actions else REST_ACTION
+
+    def save(self, path: str):
+        self.booster.save_model(path)
+
+    @classmethod
+    def load(cls, path: str) -> "ActionValueModel":
+        booster = xgb.Booster()
+        booster.load_model(path)
+        return cls(booster)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train an action-value surrogate on a trajectories.py dataset")
+    parser.add_argument("dataset", help="dataset directory")
+    parser.add_argument("--out", default="surrogate.json", help="where to save the model")
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--max-depth", type=int, default=6)
+    parser.add_argument("--learning-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    dataset = read_dataset(args.dataset, ["game", "state", "action", "final_score"])
+    model, report = ActionValueModel.train(dataset, args.trees, args.max_depth, args.learning_rate, seed=args.seed)
+    model.save(args.out)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from game_runner import run_game
+from llm_pool import LLMPool, ModelLimits
+from llm_cache import ResponseCache
+from prompts import PromptBuilder
+
+DEFAULT_SYSTEM_MESSAGE = "You are an AI player in a farming game. Make decisions to maximize your score."
+INITIAL_ELO = 1500.0
+ELO_K = 32.0
+
+class Entrant:
+    """One agent configuration: an AutoGen llm config plus a system message."""
+
+    def __init__(self, name: str, llm_config: dict, system_message: str = DEFAULT_SYSTEM_MESSAGE):
+        self.name = name
+        self.llm_config = llm_config
+        self.system_message = system_message
+
+    @property
+    def model(self) -> str:
+        return self.llm_config.get("model", "")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Entrant":
+        llm_config = dict(data["llm_config"])
+        if "api_key" not in llm_config:
+            llm_config["api_key"] = os.getenv(data.get("api_key_env", "OPENAI_API_KEY"))
+        return cls(data["name"], llm_config, data.get("system_message", DEFAULT_SYSTEM_MESSAGE))
+
+class Standing:
+    def __init__(self, name: str):
+        self.name = name
+        self.elo = INITIAL_ELO
+        self.points = 0.0
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.byes = 0
+        self.errors = 0
+        self.scores: List[float] = []
+        self.opponents: set = set()
+
+    def to_dict(self) -> dict:
+        scores = np.array(self.scores, dtype=float)
+        return {
+            "name": self.name,
+            "elo": round(self.elo, 1),
+            "points": self.points,
+            "games": len(self.scores),
+            "wins": self.wins,
+            "draws": self.draws,
+            "losses": self.losses,
+            "byes": self.byes,
+            "errors": self.errors,
+            "mean_score": float(scores.mean()) if scores.size else None,
+            "std_score": float(scores.std()) if scores.size else None,
+        }
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+def record_result(first: Standing, second: Standing, first_score: float, second_score: float):
+    outcome = 1.0 if first_score > second_score else 0.0 if first_score < second_score else 0.5
+    expected = expected_score(first.elo, second.elo)
+    first.elo += ELO_K * (outcome - expected)
+    second.elo -= ELO_K * (outcome - expected)
+    first.points += outcome
+    second.points += 1 - outcome
+    first.scores.append(first_score)
+    second.scores.append(second_score)
+    for standing, result in ((first, outcome), (second, 1 - outcome)):
+        if result == 1:
+            standing.wins += 1
+        elif result == 0:
+            standing.losses += 1
+        else:
+            standing.draws += 1
+
+def round_robin_pairings(n_entrants: int) -> List[Tuple[int, int]]:
+    return [(i, j) for i in range(n_entrants) for j in range(i + 1, n_entrants)]
+
+def swiss_pairings(standings: Sequence[Standing]) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+    """Pair neighbours in the standings, avoiding rematches where possible.
+
+    Returns the pairs and the index that sits out this round (if the field is odd).
+    """
+    order = sorted(range(len(standings)), key=lambda i: (-standings[i].points, -standings[i].elo, i))
+    bye = None
+    if len(order) % 2:
+        # The lowest-ranked entrant that hasn't had a bye yet sits out
+        bye = next((i for i in reversed(order) if not standings[i].byes), order[-1])
+        order.remove(bye)
+    pairs = []
+    while order:
+        first = order.pop(0)
+        partner = next((i for i in order if standings[i].name not in standings[first].opponents), order[0])
+        order.remove(partner)
+        pairs.append((first, partner))
+    return pairs, bye
+
+async def play_match(first: Entrant, second: Entrant, seed: int, pool: Optional[LLMPool] = None, **game_options) -> Tuple[float, float]:
+    """One game with `first` as Player 1; returns both final scores."""
+    result = None
+    async for update in run_game(
+        [{"system_message": first.system_message}, {"system_message": second.system_message}], asyncio.Event(),
+        seed=seed, llm_configs=[{"config_list": [first.llm_config]}, {"config_list": [second.llm_config]}],
+        llm_pool=pool, day_delay=0, **game_options,
+    ):
+        result = update
+    first_score, second_score = result["scores"]
+    return first_score, second_score
+
+async def play_games(entrants: Sequence[Entrant], games: Sequence[Tuple[int, int, int]], max_games: int,
+                     pool: Optional[LLMPool], **game_options) -> list:
+    """Play (first, second, seed) games on `max_games` workers; results come back in schedule order.
+
+    Workers pull the next game as soon as they finish one, so a slow game
+    never holds up a whole batch.
+    """
+    results: list = [None] * len(games)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, game in enumerate(games):
+        queue.put_nowait((index, game))
+
+    async def worker():
+        while not queue.empty():
+            index, (first, second, seed) = queue.get_nowait()
+            try:
+                results[index] = await play_match(entrants[first], entrants[second], seed, pool, **game_options)
+            except Exception as e:
+                print(f"Game {entrants[first].name} vs {entrants[second].name} (seed {seed}) failed: {e!r}")
+                results[index] = e
+
+    await asyncio.gather(*(worker() for _ in range(min(max_games, len(games)))))
+    return results
+
+async def run_tournament(entrants: Sequence[Entrant], pairing: str = "round-robin", rounds: Optional[int] = None,
+                         games_per_pair: int = 2, max_games: int = 8, seed: int = 0,
+                         pool: Optional[LLMPool] = None, **game_options) -> dict:
+    """Play a round-robin or Swiss tournament and return the standings table.
+
+    Each pairing plays `games_per_pair` games, swapping seats every game;
+    game g of every pairing uses seed `seed + g`, so all entrants face the same
+    weather. Elo ratings are updated in schedule order after each round, which
+    keeps them independent of which game happens to finish first.
+    """
+    standings = [Standing(entrant.name) for entrant in entrants]
+    if pool is None:
+        pool = LLMPool()
+
+    def schedule(pairs):
+        return [(i, j, seed + g) if g % 2 == 0 else (j, i, seed + g) for i, j in pairs for g in range(games_per_pair)]
+
+    def record(games, results):
+        for (first, second, _), result in zip(games, results):
+            standings[first].opponents.add(standings[second].name)
+            standings[second].opponents.add(standings[first].name)
+            if isinstance(result, Exception):
+                standings[first].errors += 1
+                standings[second].errors += 1
+            else:
+                record_result(standings[first], standings[second], *result)
+
+    if pairing == "round-robin":
+        games = schedule(round_robin_pairings(len(entrants)))
+        record(games, await play_games(entrants, games, max_games, pool, **game_options))
+    elif pairing == "swiss":
+        rounds = rounds or max(1, math.ceil(math.log2(max(2, len(entrants)))))
+        for _ in range(rounds):
+            pairs, bye = swiss_pairings(standings)
+            if bye is not None:
+                standings[bye].byes += 1
+                standings[bye].points += games_per_pair
+            games = schedule(pairs)
+            record(games, await play_games(entrants, games, max_games, pool, **game_options))
+    else:
+        raise ValueError(f"Unknown tournament pairing: {pairing}")
+
+    table = sorted((standing.to_dict() for standing in standings), key=lambda row: (-row["elo"], row["name"]))
+    return {
+        "pairing": pairing,
+        "table": table,
+        "llm_calls": pool.calls,
+        "llm_retries": pool.retries,
+        "llm_failures": pool.failures,
+    }
+
+def load_config(path: str) -> Tuple[List[Entrant], LLMPool]:
+    """Entrants and pool limits from a JSON file:
+
+    {"entrants": [{"name": ..., "llm_config": {"model": ..., "base_url": ...}, "system_message": ...}],
+     "limits": {"<model>": {"concurrency": 4, "rpm": 60}}, "default_limits": {"concurrency": 4}}
+    """
+    with open(path, "r") as f:
+        config = json.load(f)
+    entrants = [Entrant.from_dict(data) for data in config["entrants"]]
+    limits = {model: ModelLimits(**values) for model, values in config.get("limits", {}).items()}
+    default_limits = ModelLimits(**config["default_limits"]) if "default_limits" in config else None
+    return entrants, LLMPool(limits, default_limits, **config.get("retries", {}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a tournament between agent configurations")
+    parser.add_argument("config", help="JSON file with entrants and per-model limits")
+    parser.add_argument("--pairing", choices=["round-robin", "swiss"], default="round-robin")
+    parser.add_argument("--rounds", type=int, default=None, help="Swiss rounds (default: log2 of the field)")
+    parser.add_argument("--games-per-pair", type=int, default=2)
+    parser.add_argument("--max-games", type=int, default=8, help="games played at the same time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plan-days", type=int, default=1)
+    parser.add_argument("--compact-prompts", action="store_true")
+    parser.add_argument("--cache-dir", default=None, help="reuse LLM responses cached in this directory")
+    args = parser.parse_args()
+
+    entrants, pool = load_config(args.config)
+    game_options = {"plan_days": args.plan_days}
+    if args.compact_prompts:
+        game_options["prompts"] = PromptBuilder(compact=True)
+    if args.cache_dir:
+        game_options["cache"] = ResponseCache(args.cache_dir)
+    results = asyncio.run(run_tournament(entrants, args.pairing, args.rounds, args.games_per_pair, args.max_games,
+                                         args.seed, pool, **game_options))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+import numpy as np
+from entities import MarketState, PlayerState, PlotState
+from game_logic import apply_player_action, calculate_final_score, calculate_market_price, clear_market, process_day
+from game_rng import GameRNG
+from policies import greedy_policy, random_policy
+from rules import RULES
+
+# Decision datasets from simulated games. Every player decision becomes one
+# row of (state features, action features, next-state features, final
+# score), and a dataset is a directory with one .npy file per column plus a
+# meta.json naming the feature columns, so a column can be read (or memory
+# mapped) on its own.
+
+STATE_FEATURES = (
+    ["day", "season", "weather", "money", "energy", "plots", "vacant_plots", "growing_plots", "mature_plots",
+     "mean_growth", "mean_soil", "invalid_actions"]
+    + [f"harvested_{crop}" for crop in RULES.crop_types]
+    + [f"trend_{crop}" for crop in RULES.crop_types]
+    + [f"price_{crop}" for crop in RULES.crop_types]
+    + [f"upgrade_{upgrade}" for upgrade in RULES.upgrade_types]
+)
+ACTION_NAMES = ("Rest", "Plant", "Harvest", "Sell", "Buy", "Maintenance", "BuyCooperative")
+ACTION_INDEX = {name: i for i, name in enumerate(ACTION_NAMES)}
+# `item` is the maintenance type, or for purchases 0 for a plot and 1 + the upgrade id
+ACTION_FEATURES = ("action", "crop", "item", "amount", "plot_growth", "plot_soil")
+
+META_FILE = "meta.json"
+
+def encode_state(state: PlayerState, market: MarketState) -> np.ndarray:
+    features = np.zeros(len(STATE_FEATURES), dtype=np.float32)
+    crops = [plot.crop for plot in state.plots if plot.crop is not None]
+    mature = sum(crop.growth_progress >= 1.0 for crop in crops)
+    features[:12] = (
+        state.day, RULES.season_index.get(state.season, 0), RULES.weather_index.get(state.weather, 0),
+        state.money, state.energy, len(state.plots), len(state.plots) - len(crops), len(crops) - mature, mature,
+        np.mean([crop.growth_progress for crop in crops]) if crops else 0.0,
+        np.mean([plot.soil_quality for plot in state.plots]) if state.plots else 0.0,
+        state.invalid_action_count,
+    )
+    n_crops = len(RULES.crop_types)
+    for crop_id, crop_type in enumerate(RULES.crop_types):
+        features[12 + crop_id] = state.harvested_crops.get(crop_type, 0)
+        features[12 + n_crops + crop_id] = state.market_trends.get(crop_type, 1.0)
+        features[12 + 2 * n_crops + crop_id] = calculate_market_price(market, crop_type, RULES.crop_base_price[crop_id])
+    for upgrade in state.upgrades:
+        if upgrade in RULES.upgrade_index:
+            features[12 + 3 * n_crops + RULES.upgrade_index[upgrade]] = 1.0
+    return features
+
+def _int(text) -> Optional[int]:
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+def encode_action(state: PlayerState, action: dict) -> np.ndarray:
+    """Action features; anything unparseable is left at -1, as for an action without that field."""
+    name = action.get("name", "")
+    parameters = list(action.get("parameters") or []) + ["", ""]
+    features = np.array([ACTION_INDEX.get(name, -1), -1, -1, 0, -1, -1], dtype=np.float32)
+    plot = None
+    if name == "Plant":
+        features[1] = RULES.crop_index.get(parameters[0], -1)
+        plot = _int(parameters[1])
+    elif name in ("Harvest", "Maintenance"):
+        plot = _int(parameters[0] if name == "Harvest" else parameters[1])
+        if name == "Maintenance":
+            features[2] = RULES.maintenance_index.get(parameters[0], -1)
+    elif name == "Sell":
+        features[1] = RULES.crop_index.get(parameters[0], -1)
+        features[3] = _int(parameters[1]) or 0
+    elif name in ("Buy", "BuyCooperative"):
+        features[2] = 0 if parameters[0] == "plot" else 1 + RULES.upgrade_index.get(parameters[0], -2)
+    if plot is not None and 1 <= plot <= len(state.plots):
+        target = state.plots[plot - 1]
+        features[5] = target.soil_quality
+        if target.crop is not None:
+            features[4] = target.crop.growth_progress
+            if name == "Harvest":
+                features[1] = RULES.crop_index[target.crop.type]
+    return features
+
+def record_game(seed: int, game: int = 0, n_players: int = 2, exploration: float = 0.3) -> Dict[str, np.ndarray]:
+    """Columns for every decision of one game between epsilon-greedy players.
+
+    Each decision is random_policy's with probability `exploration` and
+    greedy_policy's otherwise, so the data covers more than one line of
+    play. The day loop is play_game's, without fast-forwarding.
+    """
+    random.seed(seed)
+    rng = GameRNG(seed, n_players=n_players)
+    shared_market = MarketState()
+    players = [PlayerState(money=RULES.starting_money, energy=RULES.max_energy, plots=[PlotState()])
+               for _ in range(n_players)]
+    days, seats, states, actions, next_states = [], [], [], [], []
+
+    for day in range(1, RULES.total_days + 1):
+        if day > 1:
+            process_day(players, shared_market, rng=rng)
+        for player, state in enumerate(players):
+            policy = random_policy if random.random() < exploration else greedy_policy
+            action = policy(state)
+            days.append(day)
+            seats.append(player)
+            states.append(encode_state(state, shared_market))
+            actions.append(encode_action(state, action))
+            apply_player_action(state, players, shared_market, action)
+            next_states.append(encode_state(state, shared_market))
+
+    clear_market(shared_market)
+    scores = np.array([calculate_final_score(state) for state in players], dtype=np.float32)
+    seats = np.array(seats, dtype=np.int16)
+    return {
+        "game": np.full(len(seats), game, dtype=np.int32),
+        "day": np.array(days, dtype=np.int16),
+        "player": seats,
+        "state": np.array(states),
+        "action": np.array(actions),
+        "next_state": np.array(next_states),
+        "final_score": scores[seats],
+    }
+
+def concatenate(parts: Sequence[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def _record_chunk(games: Sequence[int], seed: int, n_players: int, exploration: float) -> Dict[str, np.ndarray]:
+    return concatenate([record_game(seed + game, game, n_players, exploration) for game in games])
+
+def generate(num_games: int, seed: int = 0, n_players: int = 2, exploration: float = 0.3,
+             workers: Optional[int] = None, chunk_size: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Record `num_games` games (seeds seed .. seed + num_games - 1) across processes, in game order."""
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, num_games // (workers * 4))
+    chunks = [range(start, min(start + chunk_size, num_games)) for start in range(0, num_games, chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        return concatenate([_record_chunk(chunk, seed, n_players, exploration) for chunk in chunks])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_record_chunk, chunk, seed, n_players, exploration) for chunk in chunks]
+        return concatenate([future.result() for future in futures])
+
+def write_dataset(path: str, columns: Dict[str, np.ndarray], **meta):
+    os.makedirs(path, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f"{name}.npy"), values)
+    meta = dict(meta, rows=len(next(iter(columns.values()))), columns=sorted(columns),
+                state_features=list(STATE_FEATURES), action_features=list(ACTION_FEATURES))
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+def read_dataset(path: str, columns: Optional[Sequence[str]] = None, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """The dataset's columns (all of them by default), memory mapped unless `mmap` is off."""
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta["state_features"] != list(STATE_FEATURES) or meta["action_features"] != list(ACTION_FEATURES):
+        raise ValueError(f"{path} was written with different features; regenerate it")
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in (columns or meta["columns"])}
+
+def main():
+    parser = argparse.ArgumentParser(description="Record decision datasets from simulated games")
+    parser.add_argument("out", help="dataset directory")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--exploration", type=float, default=0.3, help="share of random actions")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    columns = generate(args.games, args.seed, args.players, args.exploration, args.workers)
+    write_dataset(args.out, columns, games=args.games, seed=args.seed, players=args.players, exploration=args.exploration)
+    print(f"Wrote {len(columns['game'])} decisions from {args.games} games to {args.out}")
+
+if __name__ == "__main__":
+    main()
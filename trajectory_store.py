@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from entities import PlayerState
+from headless_runner import play_game
+from policies import POLICIES
+from rules import RULES
+from trajectories import ACTION_INDEX
+
+# Day-by-day player states of many games in fixed-width binary columns, one
+# file per column, read through np.memmap so analysis code can slice
+# millions of days without loading them. Rows are ordered by game, then day,
+# then player, so the index only needs each game's first row, first day and
+# player count; the row of any (game, day, player) is computed from it.
+#
+#   store = TrajectoryStore("runs/greedy")
+#   money = store.column("money")[store.day_rows(30)]   # every player's money on day 30
+#   game = store.game(17)                               # views of one game's rows
+
+COLUMNS: Dict[str, Tuple[np.dtype, tuple]] = {
+    "day": (np.dtype(np.int16), ()),
+    "player": (np.dtype(np.int16), ()),
+    "money": (np.dtype(np.float64), ()),
+    "energy": (np.dtype(np.float32), ()),
+    "plots": (np.dtype(np.int16), ()),
+    "planted": (np.dtype(np.int16), ()),
+    "mature": (np.dtype(np.int16), ()),
+    "harvested": (np.dtype(np.int32), (len(RULES.crop_types),)),
+    "action": (np.dtype(np.int8), ()),
+    "weather": (np.dtype(np.int8), ()),
+    "invalid_actions": (np.dtype(np.int16), ()),
+    "final_score": (np.dtype(np.float64), ()),
+}
+INDEX_DTYPE = np.dtype([("game_id", np.int64), ("start", np.int64), ("first_day", np.int16),
+                        ("days", np.int16), ("players", np.int16)])
+
+META_FILE = "meta.json"
+INDEX_FILE = "index.npy"
+
+class GameRecorder:
+    """Collects one game's rows while it is played; call record_day after every player has acted."""
+
+    def __init__(self):
+        self.first_day = None
+        self.days = 0
+        self.rows: Dict[str, list] = {name: [] for name in COLUMNS if name != "final_score"}
+
+    def record_day(self, day: int, players: Sequence[PlayerState], actions: Sequence[dict]):
+        if self.first_day is None:
+            self.first_day = day
+        self.days += 1
+        rows = self.rows
+        for player, (state, action) in enumerate(zip(players, actions)):
+            crops = [plot.crop for plot in state.plots if plot.crop is not None]
+            rows["day"].append(day)
+            rows["player"].append(player)
+            rows["money"].append(state.money)
+            rows["energy"].append(state.energy)
+            rows["plots"].append(len(state.plots))
+            rows["planted"].append(len(crops))
+            rows["mature"].append(sum(crop.growth_progress >= 1.0 for crop in crops))
+            rows["harvested"].append([state.harvested_crops.get(crop_type, 0) for crop_type in RULES.crop_types])
+            rows["action"].append(ACTION_INDEX.get(action.get("name"), -1))
+            rows["weather"].append(RULES.weather_index.get(state.weather, -1))
+            rows["invalid_actions"].append(state.invalid_action_count)
+
+    def columns(self, scores: Sequence[float]) -> Dict[str, np.ndarray]:
+        columns = {name: np.array(values, dtype=COLUMNS[name][0]).reshape((-1,) + COLUMNS[name][1])
+                   for name, values in self.rows.items()}
+        columns["final_score"] = np.tile(np.asarray(scores, dtype=np.float64), self.days)
+        return columns
+
+class TrajectoryStore:
+    """A directory of column files plus a per-game index; mode "r" reads, "a" also appends games."""
+
+    def __init__(self, path: str, mode: str = "r"):
+        self.path = path
+        self.mode = mode
+        if mode == "a":
+            os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(os.path.join(path, META_FILE)) as f:
+                meta = json.load(f)
+            stored = {name: (np.dtype(dtype), tuple(shape)) for name, (dtype, shape) in meta["columns"].items()}
+            if stored != COLUMNS:
+                raise ValueError(f"{path} was written with different columns")
+            self.index = np.load(index_path)
+            self.rows = meta["rows"]
+        elif mode == "a":
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+            self.rows = 0
+        else:
+            raise FileNotFoundError(f"No trajectory store at {path}")
+        self._games = {int(game_id): i for i, game_id in enumerate(self.index["game_id"])}
+        self._columns: Dict[str, np.ndarray] = {}
+        if mode == "a":
+            # Drop rows a writer appended but never flushed, so new games start where the index ends
+            for name, (dtype, shape) in COLUMNS.items():
+                column_path = os.path.join(path, f"{name}.bin")
+                if os.path.exists(column_path):
+                    os.truncate(column_path, self.rows * dtype.itemsize * int(np.prod(shape)))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def game_ids(self) -> np.ndarray:
+        return self.index["game_id"]
+
+    def append_game(self, game_id: int, columns: Dict[str, np.ndarray]):
+        """Add one game's rows, as returned by GameRecorder.columns."""
+        if self.mode != "a":
+            raise ValueError("Store was opened read-only")
+        if game_id in self._games:
+            raise ValueError(f"Game {game_id} is already stored")
+        days = np.asarray(columns["day"])
+        n_rows = len(days)
+        players = int(np.asarray(columns["player"]).max()) + 1 if n_rows else 0
+        for name, (dtype, shape) in COLUMNS.items():
+            values = np.ascontiguousarray(columns[name], dtype=dtype)
+            if values.shape != (n_rows,) + shape:
+                raise ValueError(f"Column {name} has shape {values.shape}, expected {(n_rows,) + shape}")
+            with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                f.write(values.tobytes())
+        entry = np.array([(game_id, self.rows, days[0] if n_rows else 0, n_rows // max(players, 1), players)],
+                         dtype=INDEX_DTYPE)
+        self._games[game_id] = len(self.index)
+        self.index = np.concatenate([self.index, entry])
+        self.rows += n_rows
+        # Maps of the old file length no longer cover the store
+        self._columns.clear()
+
+    def flush(self):
+        """Write the index and row count; games appended since the last flush are invisible to readers until then."""
+        np.save(os.path.join(self.path, INDEX_FILE), self.index)
+        meta = {"rows": self.rows, "columns": {name: [dtype.str, list(shape)] for name, (dtype, shape) in COLUMNS.items()}}
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    def column(self, name: str) -> np.ndarray:
+        """The whole column, memory mapped."""
+        column = self._columns.get(name)
+        if column is None:
+            dtype, shape = COLUMNS[name]
+            if self.rows == 0:
+                column = np.zeros((0,) + shape, dtype=dtype)
+            else:
+                column = np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode="r",
+                                   shape=(self.rows,) + shape)
+            self._columns[name] = column
+        return column
+
+    def rows_of(self, game_id: int, day: Optional[int] = None, player: Optional[int] = None):
+        """The slice of a game's rows, of one of its days, or the row of one player on that day."""
+        entry = self.index[self._games[game_id]]
+        start, players = int(entry["start"]), int(entry["players"])
+        if day is None:
+            return slice(start, start + int(entry["days"]) * players)
+        offset = day - int(entry["first_day"])
+        if not 0 <= offset < entry["days"]:
+            raise KeyError(f"Game {game_id} has no day {day}")
+        start += offset * players
+        return slice(start, start + players) if player is None else start + player
+
+    def game(self, game_id: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Views of one game's rows (no copies), for every column or only `columns`."""
+        rows = self.rows_of(game_id)
+        return {name: self.column(name)[rows] for name in (columns or COLUMNS)}
+
+    def day_rows(self, day: int, player: Optional[int] = None) -> np.ndarray:
+        """Row numbers of `day` in every game that has it, for all players or only `player`."""
+        index = self.index
+        offset = day - index["first_day"].astype(np.int64)
+        present = (offset >= 0) & (offset < index["days"])
+        starts = index["start"][present] + offset[present] * index["players"][present]
+        if player is not None:
+            return starts[index["players"][present] > player] + player
+        players = index["players"][present]
+        if len(players) and (players == players[0]).all():
+            return (starts[:, None] + np.arange(players[0])).ravel()
+        return np.concatenate([np.arange(start, start + n) for start, n in zip(starts, players)] or [np.zeros(0, np.int64)])
+
+def _simulate_chunk(player1: str, player2: str, seeds: Sequence[int]) -> List[Tuple[int, Dict[str, np.ndarray]]]:
+    games = []
+    for seed in seeds:
+        recorder = GameRecorder()
+        scores = play_game(POLICIES[player1], POLICIES[player2], seed, recorder=recorder)
+        games.append((seed, recorder.columns(scores)))
+    return games
+
+def simulate(path: str, player1: str, player2: str, num_games: int, seed: int = 0,
+             workers: Optional[int] = None, chunk_size: Optional[int] = None) -> TrajectoryStore:
+    """Play headless games across processes and append them to the store at `path`, with the seed as game id."""
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, num_games // (workers * 4))
+    seeds = list(range(seed, seed + num_games))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, num_games, chunk_size)]
+    store = TrajectoryStore(path, "a")
+    if workers == 1:
+        for chunk in chunks:
+            for game_id, columns in _simulate_chunk(player1, player2, chunk):
+                store.append_game(game_id, columns)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # At most two chunks per worker are in flight or waiting to be
+            # written, so memory stays bounded when the writer falls behind;
+            # games are still appended in seed order
+            pending = deque()
+            for chunk in chunks:
+                if len(pending) == 2 * workers:
+                    for game_id, columns in pending.popleft().result():
+                        store.append_game(game_id, columns)
+                pending.append(executor.submit(_simulate_chunk, player1, player2, chunk))
+            while pending:
+                for game_id, columns in pending.popleft().result():
+                    store.append_game(game_id, columns)
+    store.flush()
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Record headless games into a memory-mapped trajectory store")
+    parser.add_argument("out", help="store directory (appended to if it exists)")
+    parser.add_argument("--player1", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--player2", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    store = simulate(args.out, args.player1, args.player2, args.games, args.seed, args.workers)
+    print(f"{args.out}: {len(store.index)} games, {len(store)} player-days")
+
+if __name__ == "__main__":
+    main()